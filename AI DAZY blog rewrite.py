@@ -3,7 +3,6 @@
 # 기본 영역 ----------------------------------------------------------------------------------------------------------------------------------------------------
 
 import streamlit as st
-import zipfile
 import os
 import openai
 import json
@@ -15,8 +14,12 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from hdbscan import HDBSCAN
+from dazy_cache import get_caches
+from dazy_llm import gather_with_progress, get_engine, map_reduce_texts
+from dazy_zip import ZipStreamWriter
+from dazy_extract import content_hash, extract_texts
+from dazy_match import TaxonomyIndex, group_by_topic, routed_match, topk_match
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 
 # ============================
@@ -25,6 +28,38 @@ from sklearn.metrics.pairwise import cosine_similarity
 MAX_FILES_PER_CLUSTER = 25
 MAX_RECURSION_DEPTH = 2
 
+# ============================
+# 🧠 Embedding Store Settings
+# ============================
+EMBED_DTYPE = "float32"   # "float16" 으로 바꾸면 디스크/메모리 절반
+EMBED_DIMENSIONS = None   # 예: 1024 → API 에 축소된 차원 요청 (None = 모델 기본 3072)
+EMBED_REDUCE = None       # "pca" / "random" → 캐시된 코퍼스로 로컬 차원 축소 후 클러스터링·매칭
+EMBED_REDUCE_DIM = 256
+
+# ============================
+# 📄 Content Extraction Settings
+# ============================
+EXTRACT_CHAR_BUDGET = 4000   # 문서당 본문 추출 상한 (PDF 는 페이지 단위로 읽다가 중단)
+
+# ============================
+# 🧭 Category Matching Settings
+# ============================
+MATCH_ROUTING = False       # 카테고리 중심으로 먼저 라우팅 후 해당 하위 주제와만 비교 (전수 비교와 일치율 < 1)
+MATCH_ROUTE_MIN_TOPICS = 5000   # 하위 주제가 이보다 적으면 라우팅 켜도 전수 비교 (dazy_bench.py match: 500개 0.8배 / 2000개 1.5배 / 5000개 2.9배)
+MATCH_ROUTE_K = 3           # 문서당 후보 카테고리 수
+MATCH_ROUTE_MARGIN = 0.02   # 1순위 / 첫 제외 카테고리 점수 차가 이보다 작으면 전수 비교 (None = 폴백 없음)
+
+# ============================
+# 📝 README Settings
+# ============================
+README_CHUNK_SIZE = 40      # subtopic 초안이 이보다 많으면 묶음별 요약(병렬) 후 README 작성
+
+# ============================
+# ⚡ OpenAI Rate Limit Settings
+# ============================
+OPENAI_RPM = 500        # 분당 요청 수 한도
+OPENAI_TPM = 200_000    # 분당 토큰 수 한도
+
 # ============================
 # 🔐 Token Store (Server Memory)
 # ============================
@@ -246,35 +281,24 @@ unsafe_allow_html=True,
 # 캐시
 # ------------------------------------------
 CACHE_DIR = Path(".cache")
-CACHE_DIR.mkdir(exist_ok=True)
 
-def load_cache(p):
-    try:
-        return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
-    except Exception:
-        return {}
-
-def save_cache(p, d):
-    p.write_text(json.dumps(d, ensure_ascii=False, indent=2), encoding="utf-8")
-
-EMBED_CACHE = CACHE_DIR / "embeddings.json"
-GROUP_CACHE = CACHE_DIR / "group_names.json"
-README_CACHE = CACHE_DIR / "readmes.json"
-EXPAND_CACHE = CACHE_DIR / "expands.json"
+# 서버 프로세스당 1회만 로드 → rerun / 세션 간 공유
+caches = get_caches(
+    CACHE_DIR,
+    embed_dtype=EMBED_DTYPE,
+    embed_dims=EMBED_DIMENSIONS,
+    reduce=EMBED_REDUCE,
+    reduce_dim=EMBED_REDUCE_DIM,
+)
 
-embedding_cache = load_cache(EMBED_CACHE)
-group_cache = load_cache(GROUP_CACHE)
-readme_cache = load_cache(README_CACHE)
-expand_cache = load_cache(EXPAND_CACHE)
+embedding_cache = caches.embeddings
+vector_store = caches.vectors   # 클러스터링 / 매칭용 (축소 설정 시 축소 벡터)
+group_cache = caches.group
+readme_cache = caches.readme
+expand_cache = caches.expand
 
 def reset_cache():
-    if CACHE_DIR.exists():
-        shutil.rmtree(CACHE_DIR)
-    CACHE_DIR.mkdir(exist_ok=True)
-    embedding_cache.clear()
-    group_cache.clear()
-    readme_cache.clear()
-    expand_cache.clear()
+    caches.reset()
 
 def reset_output():
     output_dir = Path("output_docs")
@@ -300,6 +324,9 @@ st.sidebar.markdown(
 # ------------------------------------------
 openai.api_key = st.session_state.api_key
 
+# API Key 별 공용 요청 엔진 (RPM/TPM 예산 + 재시도 + 적응형 동시성)
+engine = get_engine(st.session_state.api_key, rpm=OPENAI_RPM, tpm=OPENAI_TPM)
+
 with st.sidebar:
     st.success("API 인증 성공")
 
@@ -433,29 +460,8 @@ def title_from_filename(file_name: str) -> str:
     base = re.sub(r"\\s+", " ", base).strip()
     return base
 
-def embed_texts(texts, batch_size=50):
-    """입력 텍스트 리스트를 OpenAI 임베딩 API로 변환 (대용량 안전)"""
-    results = []
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        missing = [t for t in batch if h(t) not in embedding_cache]
-
-        if missing:
-            try:
-                r = openai.Embedding.create(
-                    model="text-embedding-3-large",
-                    input=missing,
-                )
-                for t, d in zip(missing, r["data"]):
-                    embedding_cache[h(t)] = d["embedding"]
-                save_cache(EMBED_CACHE, embedding_cache)
-            except Exception as e:
-                st.error(f"❌ 임베딩 생성 중 오류 발생 (batch {i//batch_size+1}): {e}")
-                continue
-
-        results.extend([embedding_cache[h(t)] for t in batch])
-
-    return results
+def embed_params():
+    return {"dimensions": EMBED_DIMENSIONS} if EMBED_DIMENSIONS else {}
 
 def load_category_structure(readme_file):
     text = readme_file.getvalue().decode("utf-8")
@@ -470,7 +476,7 @@ def load_category_structure(readme_file):
 ]
 """
 
-    r = openai.ChatCompletion.create(
+    r = engine.chat_sync(
         model="gpt-4.1-mini",
         messages=[
             {"role": "system", "content": "너는 문서를 JSON 구조로 파싱하는 전문가다."},
@@ -486,91 +492,138 @@ def load_category_structure(readme_file):
         return []
 
 # ============================
-# 📘 README 기반 폴더 생성 (선택)
+# 🧠 문서 확장 + 임베딩 통합
 # ============================
 
-def create_category_folders(base_dir, category_structure):
-    folder_map = {}
-    for cat in category_structure:
-        cat_folder = base_dir / f"{sanitize_folder_name(cat['category'])}"
-        cat_folder.mkdir(exist_ok=True)
-        sub_map = {}
-        for sub in cat.get("subtopics", []):
-            sub_folder = cat_folder / sanitize_folder_name(sub)
-            sub_folder.mkdir(exist_ok=True)
-            sub_map[sub] = sub_folder
-        folder_map[cat['category']] = sub_map
-    return folder_map
+def embed_texts(texts, keys=None):
+    """입력 텍스트 리스트를 OpenAI 임베딩 API로 변환 (대용량/토큰 제한 안전 버전)
 
-# ============================
-# 🧠 문서 확장 + 임베딩 통합
-# ============================
+    - 토큰 추정치 / 입력 개수 한도까지 채운 배치를 동시에 요청, 실패한 배치는 반으로 나눠 재요청
+    - keys 를 주면 텍스트 hash 대신 그 키로 캐시 (블로그 문서는 content hash 사용)
+    """
+    if keys is None:
+        keys = [h(t) for t in texts]
 
-def embed_texts(texts, batch_size=40):
-    """입력 텍스트 리스트를 OpenAI 임베딩 API로 변환 (대용량/토큰 제한 안전 버전)"""
-    results = []
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        missing = [t for t in batch if h(t) not in embedding_cache]
-
-        if missing:
-            try:
-                # 각 batch별 임베딩 요청
-                r = openai.Embedding.create(
-                    model="text-embedding-3-large",
-                    input=missing,
-                )
-                for t, d in zip(missing, r["data"]):
-                    embedding_cache[h(t)] = d["embedding"]
-
-                # ✅ 캐시 저장
-                save_cache(EMBED_CACHE, embedding_cache)
-                log(f"🧩 임베딩 batch {i//batch_size + 1} 완료 ({len(batch)}개)")
-            except Exception as e:
-                st.error(f"❌ 임베딩 batch {i//batch_size + 1} 오류: {e}")
-                continue
+    missing = list({k: t for k, t in zip(keys, texts) if k not in embedding_cache}.items())
+
+    if missing:
+        def on_batch(idx, vectors):
+            # ✅ 끝난 배치는 바로 캐시 저장 (행렬 파일에 append)
+            embedding_cache.add([missing[i][0] for i in idx], vectors)
+            log(f"🧩 임베딩 batch 완료 ({len(idx)}개)")
 
-        # 캐시된 벡터를 순서대로 append
-        results.extend([embedding_cache[h(t)] for t in batch])
+        try:
+            engine.run(engine.embed_many(
+                [t for _, t in missing],
+                on_batch=on_batch,
+                model="text-embedding-3-large",
+                **embed_params(),
+            ))
+        except Exception as e:
+            st.error(f"❌ 임베딩 생성 중 오류 발생: {e}")
+            return np.empty((0, 0), dtype=np.float32)
 
-    return results
+    # (len(texts), dim) float32 배열
+    return vector_store.take(keys)
 
 
 def prepare_blog_embeddings(files):
-    """블로그 초안 임베딩 생성 (방어 버전)"""
+    """블로그 초안 임베딩 생성 (방어 버전)
+
+    반환: ({대표 파일: 벡터}, {대표 파일: [내용이 같은 업로드들]}, {대표 파일: content hash})
+    내용이 같은 업로드는 content hash 로 합쳐 1번만 추출 / 임베딩하고, ZIP 기록 때 다시 펼친다.
+    """
     texts, file_objs = [], []
 
+    groups = {}
     for f in files:
-        try:
-            text = f.getvalue().decode("utf-8", errors="ignore")
-        except Exception:
-            st.warning(f"⚠️ {f.name} 파일 읽기 실패 — 건너뜀")
-            continue
+        groups.setdefault(content_hash(f.getvalue()), []).append(f)
+    hashes = list(groups)
+    reps = [copies[0] for copies in groups.values()]
+    copies = {copies[0]: copies for copies in groups.values()}
+    doc_hashes = dict(zip(reps, hashes))
+    if len(reps) < len(files):
+        log(f"🧬 내용이 같은 파일 {len(files) - len(reps)}개 병합")
+
+    # 본문 추출: 4000자 예산까지만 (PDF 는 프로세스 풀, 결과는 content hash 로 캐시)
+    contents = extract_texts(
+        [(f.name, f.getvalue()) for f in reps],
+        budget=EXTRACT_CHAR_BUDGET,
+        cache=caches.extracts,
+        hashes=hashes,
+    )
+
+    for f, clean_text in zip(reps, contents):
+        if not clean_text:
+            st.warning(f"⚠️ {f.name} 본문 추출 실패 — 제목만 사용")
 
         title = title_from_filename(f.name)
-        clean_text = re.sub(r"\s+", " ", text.strip())[:4000]  # 4000자 제한
         texts.append(f"제목: {title}\n내용: {clean_text}")
         file_objs.append(f)
 
     if not texts:
         st.error("❌ 업로드된 블로그 초안에서 읽을 수 있는 문서가 없습니다.")
-        return {}
+        return {}, {}, {}
 
-    vectors = embed_texts(texts)
+    # 캐시 키 = 내용 hash (+추출 예산) → 이름만 바뀐 재업로드는 API 호출 없음
+    vectors = embed_texts(texts, keys=[f"doc:{ch}:{EXTRACT_CHAR_BUDGET}" for ch in hashes])
 
-    if not vectors or len(vectors) != len(file_objs):
+    if len(vectors) == 0 or len(vectors) != len(file_objs):
         st.error(f"❌ 임베딩 생성 실패: {len(vectors)} / 기대값 {len(file_objs)}")
-        return {}
+        return {}, {}, {}
 
     st.write(f"✅ 임베딩 완료: {len(vectors)}개 문서 변환됨.")
-    return dict(zip(file_objs, vectors))
+    return dict(zip(file_objs, vectors)), copies, doc_hashes
+
+
+# ============================
+# 🗂️ 카테고리 인덱스 (README 내용 hash 로 저장)
+# ============================
+
+def load_taxonomy_index(readme_file):
+    """카테고리 트리 + 주제 목록 + 주제 행렬을 README 내용 hash 단위로 캐시
+
+    같은 README 면 LLM 파싱 / 주제 임베딩 / 행렬 재구성을 모두 건너뛴다.
+    벡터 공간(임베딩 차원 / 축소 모델) 이 바뀌었으면 트리만 재사용하고 행렬은 다시 만든다.
+    """
+    index_path = CACHE_DIR / f"taxonomy.{content_hash(readme_file.getvalue())}.npz"
+    space = caches.vector_space()
+    structure = None
+
+    if index_path.exists():
+        try:
+            index = TaxonomyIndex.load(index_path)
+            if index.space == space:
+                log(f"🗂️ 카테고리 인덱스 재사용 ({len(index.topics)}개 주제)")
+                return index
+            structure = index.structure
+        except Exception:
+            index_path.unlink()
+
+    if structure is None:
+        structure = load_category_structure(readme_file)
+
+    topics = TaxonomyIndex.flatten(structure)
+    if not topics:
+        st.error("❌ 카테고리 구조에 subtopics가 없습니다. README 파일 확인 필요.")
+        return None
+
+    topic_embeddings = embed_texts([f"{cat} - {sub}" for cat, sub in topics])
+    if len(topic_embeddings) == 0 or len(topic_embeddings) != len(topics):
+        st.error("❌ 카테고리 주제 임베딩 실패.")
+        return None
+
+    index = TaxonomyIndex(structure, topics, topic_embeddings, space)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    index.save(index_path)
+    return index
 
 
 # ============================
 # 📦 클러스터링 + 자동 재분해 (조건부)
 # ============================
 
-def match_documents_to_categories(embeddings, category_structure):
+def match_documents_to_categories(embeddings, taxonomy):
     """문서와 카테고리 매칭 (방어 + 디버그 버전)"""
 
     # ✅ 1단계: 임베딩 유효성 검사
@@ -585,36 +638,40 @@ def match_documents_to_categories(embeddings, category_structure):
     except Exception:
         st.warning("⚠️ 임베딩 키 샘플 표시 중 오류 (무시 가능)")
 
-    all_topics = []
-    for c in category_structure:
-        for sub in c.get("subtopics", []):
-            all_topics.append((c["category"], sub))
-
-    if not all_topics:
-        st.error("❌ 카테고리 구조에 subtopics가 없습니다. README 파일 확인 필요.")
-        return {}
-
-    topic_texts = [f"{cat} - {sub}" for cat, sub in all_topics]
-    topic_embeddings = embed_texts(topic_texts)
-
-    if not topic_embeddings or len(topic_embeddings) != len(all_topics):
-        st.error("❌ 카테고리 주제 임베딩 실패.")
+    # 카테고리 인덱스 (load_taxonomy_index 에서 파싱 / 임베딩 실패 시 None)
+    if taxonomy is None:
         return {}
+    all_topics = taxonomy.topics
 
-    # ✅ 안전하게 numpy 배열 생성
+    # ✅ 안전하게 numpy 배열 생성 (float32 행 → 한 번에 stack)
     try:
-        doc_vecs = np.array(list(embeddings.values()), dtype=float)
+        doc_vecs = np.stack(list(embeddings.values())).astype(np.float32, copy=False)
     except Exception as e:
         st.error(f"❌ 문서 임베딩 배열 변환 중 오류: {e}")
         return {}
 
-    sim = cosine_similarity(doc_vecs, np.array(topic_embeddings))
-    match_results = {cat: {sub: [] for sub in [s for _, s in all_topics if _ == cat]} for cat, _ in all_topics}
+    # 정규화된 float32 행렬을 행 블록 단위로 곱해서 1순위 주제만 뽑기 (전체 유사도 행렬 없음)
+    if MATCH_ROUTING and len(all_topics) >= MATCH_ROUTE_MIN_TOPICS:
+        # 2단계: 카테고리 중심 상위 MATCH_ROUTE_K 개 → 그 카테고리의 하위 주제와만 비교
+        best, _, fallback = routed_match(
+            doc_vecs, taxonomy.matrix, taxonomy.groups,
+            route_k=MATCH_ROUTE_K, margin=MATCH_ROUTE_MARGIN,
+            centroids=taxonomy.centroids,
+        )
+        best = best[:, None]
+        if fallback.any():
+            log(f"🧭 라우팅 불확실 → 전수 비교 {int(fallback.sum())}개")
+    else:
+        best, _ = topk_match(doc_vecs, taxonomy.matrix, k=1)
+    file_objs = list(embeddings.keys())
 
-    for i, (file_obj, _) in enumerate(embeddings.items()):
-        best_idx = int(np.argmax(sim[i]))
-        cat, sub = all_topics[best_idx]
-        match_results[cat][sub].append(file_obj)
+    match_results = {}
+    for cat, sub in all_topics:
+        match_results.setdefault(cat, {})[sub] = []
+
+    for t, members in enumerate(group_by_topic(best[:, 0], len(all_topics))):
+        cat, sub = all_topics[t]
+        match_results[cat][sub].extend(file_objs[i] for i in members)
 
     st.success("✅ 문서-카테고리 매핑 완료.")
     return match_results
@@ -623,15 +680,61 @@ def match_documents_to_categories(embeddings, category_structure):
 # ✨ GPT 폴더명 / README 생성
 # ============================
 
-def generate_summary_readme(category, subtopic, files):
+def summary_readme_key(category, subtopic, keys):
+    # 카테고리 + 하위 주제 + 포함된 초안들의 content hash (정렬) → 구성원이 같으면 같은 README
+    return h("blog||" + category + "||" + subtopic + "||" + "||".join(sorted(keys)))
+
+async def summarize_title_chunk(items, level):
+    """map 단계: 초안 제목(또는 하위 요약) 한 묶음 → 짧은 요약 (캐시)"""
+    k = h(f"blogmap{level}||" + "||".join(items))
+    if k in readme_cache:
+        return readme_cache[k]
+
+    what = "블로그 초안 제목" if level == 0 else "초안 묶음 요약"
+    prompt = f"""
+다음 {what}들의 공통 방향성과 주요 주제를 한국어 5줄 이내로 요약하세요.
+
+{chr(10).join(items)}
+"""
+
+    r = await engine.chat(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "너는 한국어로 짧게 요약한다."},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=300,
+        temperature=0.2,
+    )
+
+    content = r["choices"][0]["message"]["content"].strip()
+    readme_cache[k] = content
+    return content
+
+async def generate_summary_readme(category, subtopic, files, keys):
+    k = summary_readme_key(category, subtopic, keys)
+    if k in readme_cache:
+        return readme_cache[k]
+
     file_titles = [title_from_filename(f.name) for f in files]
     file_titles_text = "\n".join(f"- {t}" for t in file_titles)
 
+    # 초안이 많으면 제목 묶음을 병렬로 요약(map) → 요약들로 README 작성(reduce)
+    # 문서 목록은 모델이 다시 쓰지 않고 생성 후 그대로 붙인다 → 폴더 크기와 무관하게 요청 크기 고정
+    oversized = len(file_titles) > README_CHUNK_SIZE
+    digest = ""
+    file_list = f"### 포함된 문서 목록\n{file_titles_text}"
+    list_section = file_list
+    if oversized:
+        parts = await map_reduce_texts(sorted(file_titles), README_CHUNK_SIZE, summarize_title_chunk)
+        digest = f"\n참고 — 초안 {len(file_titles)}개 묶음 요약:\n" + "\n\n".join(parts) + "\n"
+        list_section = ""
+
     prompt = f"""
 '{category}' 카테고리의 '{subtopic}' 주제와 관련된 블로그 초안들입니다.
 이 글들의 공통된 방향성과 시너지, 주제적 연결성을 분석하고
 README 요약 파일을 작성하세요.
-
+{digest}
 형식:
 # README_{subtopic}
 
@@ -644,11 +747,10 @@ README 요약 파일을 작성하세요.
 ## 🎯 공통 목표
 (이 주제에서 일관된 핵심 목표는 무엇인지)
 
-### 포함된 문서 목록
-{file_titles_text}
+{list_section}
 """
 
-    r = openai.ChatCompletion.create(
+    r = await engine.chat(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "너는 블로그 카테고리 기반 요약문서를 생성하는 전문가다."},
@@ -657,7 +759,11 @@ README 요약 파일을 작성하세요.
         temperature=0.5,
     )
 
-    return r["choices"][0]["message"]["content"].strip()
+    content = r["choices"][0]["message"]["content"].strip()
+    if oversized:
+        content += "\n\n" + file_list
+    readme_cache[k] = content
+    return content
 
 # ============================
 # 🚀 메인 파이프라인 실행 (상태바 포함)
@@ -680,29 +786,29 @@ if uploaded_files:
         st.stop()
 
     reset_output()
-    output_dir = Path("output_docs")
-    output_dir.mkdir(exist_ok=True)
 
     # 단계별 가중치 (총 100%)
     # 파싱 10, 임베딩 25, 매핑 25, README 생성 35, ZIP 5
     update_progress(5, "환경 초기화…")
 
+    # 차원 축소 모델 (재)fit 은 실행 시작 시점에만 → 문서 / 주제 벡터가 같은 공간
+    caches.refresh_vectors()
+
     # 1) 카테고리 파싱 (10%)
     update_progress(10, "📘 카테고리 구조 분석 중…")
-    category_structure = load_category_structure(readme_file)
+    taxonomy = load_taxonomy_index(readme_file)
+    category_structure = taxonomy.structure if taxonomy is not None else []
 
-    # 폴더 뼈대 생성 (UI 변화 없음)
-    folder_map = create_category_folders(output_dir, category_structure)
     update_progress(15, "📂 폴더 구조 준비 완료")
 
     # 2) 임베딩 (25%)
     update_progress(20, "🧠 블로그 문서 임베딩 생성 중…")
-    embeddings = prepare_blog_embeddings(blog_files)
+    embeddings, copies, doc_hashes = prepare_blog_embeddings(blog_files)
     update_progress(35, "🧠 임베딩 완료")
 
     # 3) 매핑 (25%)
     update_progress(40, "📦 문서를 카테고리별로 매핑 중…")
-    mapping = match_documents_to_categories(embeddings, category_structure)
+    mapping = match_documents_to_categories(embeddings, taxonomy)
     update_progress(65, "📦 매핑 완료")
 
     # 4) README 생성 (35%) — 하위 단위별로 세밀 진행률
@@ -715,46 +821,57 @@ if uploaded_files:
     )
 
     unit_weight = 35 / total_work_units  # 각각의 주제 완료 시 진행률 반영
-    cur_pct = 65
-    update_progress(cur_pct, "📝 README 요약 생성 시작…")
+    update_progress(65, "📝 README 요약 생성 시작…")
 
-    for category, subtopics in mapping.items():
-        cat_folder = output_dir / sanitize_folder_name(category)
-        cat_folder.mkdir(exist_ok=True)
+    # 결과 ZIP 에 바로 기록 (output_docs 스테이징 없음)
+    zip_writer = ZipStreamWriter()
 
+    work_units = []   # [(category, sub, sub_folder, files), ...]
+    for category, subtopics in mapping.items():
         for sub, files in subtopics.items():
             if not files:
                 continue
 
-            sub_folder = cat_folder / sanitize_folder_name(sub)
-            sub_folder.mkdir(exist_ok=True)
+            sub_folder = f"{sanitize_folder_name(category)}/{sanitize_folder_name(sub)}"
 
-            # 파일 저장
+            # 파일 저장 (내용이 같은 업로드는 여기서 다시 펼침)
             for f in files:
-                (sub_folder / f.name).write_bytes(f.getvalue())
+                for c in copies.get(f, [f]):
+                    zip_writer.add(f"{sub_folder}/{c.name}", c.getvalue())
+
+            work_units.append((category, sub, sub_folder, files))
 
-            # README 생성
-            summary = generate_summary_readme(category, sub, files)
-            (sub_folder / f"README_{sanitize_folder_name(sub)}.md").write_text(
-                summary, encoding="utf-8"
-            )
+    # README 캐시: 구성원(content hash) 이 그대로인 subtopic 은 재사용, 바뀐 곳만 새로 생성
+    unit_keys = [[doc_hashes[f] for f in files] for _, _, _, files in work_units]
+    readme_hits = sum(
+        summary_readme_key(category, sub, keys) in readme_cache
+        for (category, sub, _, _), keys in zip(work_units, unit_keys)
+    )
+    log(f"📊 README 캐시: 재사용 {readme_hits}개 / 새로 생성 {len(work_units) - readme_hits}개")
 
-            # 진행률 갱신
-            cur_pct = min(100, int(cur_pct + unit_weight))
-            update_progress(cur_pct, f"📝 README 생성 중… ({category} > {sub})")
+    # README 생성 — 모든 subtopic 을 동시에 요청 (엔진의 공용 동시성 한도 안에서)
+    def on_readme_done(n, _total):
+        # 진행률 갱신 (완료 순서대로)
+        update_progress(min(100, int(65 + n * unit_weight)), f"📝 README 생성 중… ({n} / {_total})")
+
+    summaries = engine.run(gather_with_progress(
+        [
+            generate_summary_readme(category, sub, files, keys)
+            for (category, sub, _, files), keys in zip(work_units, unit_keys)
+        ],
+        on_readme_done,
+    ))
+
+    for (category, sub, sub_folder, _), summary in zip(work_units, summaries):
+        zip_writer.add_text(f"{sub_folder}/README_{sanitize_folder_name(sub)}.md", summary)
+        log(f"📝 README 저장 ({category} > {sub})")
 
     # 5) ZIP (5%)
     update_progress(95, "📦 ZIP 파일 생성 중…")
-    zip_path = Path("result_documents.zip")
-    with zipfile.ZipFile(zip_path, "w") as z:
-        for root, _, files in os.walk(output_dir):
-            for f in files:
-                p = os.path.join(root, f)
-                z.write(p, arcname=os.path.relpath(p, output_dir))
 
     zip_placeholder.download_button(
         "[ Download Result ]",
-        open("result_documents.zip", "rb"),
+        zip_writer.getvalue(),
         file_name="categorized_blogs.zip",
         mime="application/zip",
         use_container_width=True,
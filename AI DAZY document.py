@@ -1,18 +1,18 @@
 # AI DAZY v2512190245_1.1
 
 import streamlit as st
-import zipfile
 import os
 import openai
 import json
-import hashlib
-import re
-import shutil
 import secrets
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from hdbscan import HDBSCAN
+from dazy_cache import get_caches
+from dazy_llm import get_engine
+from dazy_zip import ZipStreamWriter
+from dazy_jobs import get_runner
+from dazy_pipeline import DocumentPipeline, LocalFile, PipelineSettings, build_doc_table, folder_entries
 
 
 # ============================
@@ -21,6 +21,62 @@ from hdbscan import HDBSCAN
 MAX_FILES_PER_CLUSTER = 25
 MAX_RECURSION_DEPTH = 2
 
+# ============================
+# 🌳 Clustering Settings
+# ============================
+HDBSCAN_MIN_CLUSTER_SIZE = 3
+HDBSCAN_MIN_SAMPLES = 1
+CLUSTER_SINGLE_FIT = False   # True → 전체 1회 fit 후 하위 폴더는 condensed tree 에서 분할
+CLUSTER_BACKEND = "auto"     # "auto" / "hdbscan" / "kmeans" / "agglomerative"
+ORGANIZE_INCREMENTAL = True  # 기존 폴더 트리가 있으면 새 문서만 가장 가까운 폴더에 배치 (전체 재분류는 요청 시)
+
+# ============================
+# 🤖 Model Settings
+# ============================
+EXPAND_MODEL = "gpt-5-nano"
+EMBED_MODEL = "text-embedding-3-large"
+FOLDER_MODEL = "gpt-4o-mini"   # 폴더명 / README / 묶음 요약
+
+# ============================
+# 🧠 Embedding Store Settings
+# ============================
+EMBED_DTYPE = "float32"   # "float16" 으로 바꾸면 디스크/메모리 절반
+EMBED_DIMENSIONS = None   # 예: 1024 → API 에 축소된 차원 요청 (None = 모델 기본 3072)
+EMBED_REDUCE = None       # "pca" / "random" → 캐시된 코퍼스로 로컬 차원 축소 후 클러스터링·매칭
+EMBED_REDUCE_DIM = 256
+
+# ============================
+# ⚡ OpenAI Rate Limit Settings
+# ============================
+OPENAI_RPM = 500        # 분당 요청 수 한도
+OPENAI_TPM = 200_000    # 분당 토큰 수 한도
+
+# ============================
+# 📦 Expand Batch Settings
+# ============================
+EXPAND_BATCH_SIZE = 20      # 요청 1회당 파일 수 (1 이하 → 파일별 단건 요청)
+EXPAND_BATCH_RETRIES = 1    # 파싱 실패 항목만 다시 묶어서 재요청하는 횟수
+
+# ============================
+# 📄 Content Extraction Settings
+# ============================
+EXTRACT_CHAR_BUDGET = 4000   # 문서당 본문 추출 상한 (PDF 는 페이지 단위로 읽다가 중단)
+EXPAND_EXCERPT_CHARS = 600   # expand 프롬프트에 넣는 본문 앞부분 길이
+
+# ============================
+# 📝 Folder Naming Settings
+# ============================
+FOLDER_COMBINED_CALL = True  # 폴더명 + README 를 폴더당 1회의 JSON 응답으로 (False = 2단계 요청)
+README_CHUNK_SIZE = 40       # 폴더 문서가 이보다 많으면 묶음별 요약(병렬) 후 README 작성
+
+# ============================
+# 🧵 Background Job Settings
+# ============================
+JOB_WORKERS = 2           # 동시에 실행하는 작업 수 (서버 프로세스 전체, 나머지는 대기열)
+JOB_POLL_SECONDS = 1.0    # 실행 중인 작업 상태를 다시 읽는 간격
+JOB_KEEP_HOURS = 24       # 끝난 작업 / 결과 ZIP 보관 시간
+JOB_RESULT_DIR = Path("job_results")
+
 # ============================
 # 🔐 Token Store (Server Memory)
 # ============================
@@ -243,44 +299,36 @@ unsafe_allow_html=True,
 # 캐시
 # ----------------------------
 CACHE_DIR = Path(".cache")
-CACHE_DIR.mkdir(exist_ok=True)
-
-def load_cache(p):
-    try:
-        return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
-    except Exception:
-        return {}
 
-def save_cache(p, d):
-    p.write_text(json.dumps(d, ensure_ascii=False, indent=2), encoding="utf-8")
+# 서버 프로세스당 1회만 로드 → rerun / 세션 간 공유
+caches = get_caches(
+    CACHE_DIR,
+    embed_dtype=EMBED_DTYPE,
+    embed_dims=EMBED_DIMENSIONS,
+    reduce=EMBED_REDUCE,
+    reduce_dim=EMBED_REDUCE_DIM,
+)
 
-EMBED_CACHE = CACHE_DIR / "embeddings.json"
-GROUP_CACHE = CACHE_DIR / "group_names.json"
-README_CACHE = CACHE_DIR / "readmes.json"
-EXPAND_CACHE = CACHE_DIR / "expands.json"
+# 작업 풀 + 레지스트리도 프로세스당 1개 → 위젯 조작 / 새로고침과 무관하게 작업이 계속 돈다
+runner = get_runner(JOB_RESULT_DIR, workers=JOB_WORKERS, keep_hours=JOB_KEEP_HOURS)
 
-embedding_cache = load_cache(EMBED_CACHE)
-group_cache = load_cache(GROUP_CACHE)
-readme_cache = load_cache(README_CACHE)
-expand_cache = load_cache(EXPAND_CACHE)
+# 작업 소유자: URL 인증 토큰 (새로고침해도 같은 작업을 다시 찾는다)
+if "job_owner" not in st.session_state:
+    st.session_state.job_owner = token or secrets.token_hex(16)
+job_owner = st.session_state.job_owner
 
 def reset_cache():
-    if CACHE_DIR.exists():
-        shutil.rmtree(CACHE_DIR)
-    CACHE_DIR.mkdir(exist_ok=True)
-    embedding_cache.clear()
-    group_cache.clear()
-    readme_cache.clear()
-    expand_cache.clear()
+    # 실행 중인 작업이 캐시를 쓰고 있으면 초기화하지 않는다
+    if any(job.active for job in runner.jobs()):
+        return False
+    caches.reset()
+    return True
 
 def reset_output():
-    output_dir = Path("output_docs")
-    zip_path = Path("result_documents.zip")
-
-    if output_dir.exists():
-        shutil.rmtree(output_dir)
-    if zip_path.exists():
-        zip_path.unlink()
+    # 이 세션의 끝난 작업 / 결과 ZIP(JOB_RESULT_DIR) 정리 — 실행 중인 작업은 남긴다
+    for job in runner.jobs(job_owner):
+        runner.remove(job.id)
+    st.session_state.pop("job_id", None)
 
 st.sidebar.markdown(
     """
@@ -297,6 +345,9 @@ st.sidebar.markdown(
 # ----------------------------
 openai.api_key = st.session_state.api_key
 
+# API Key 별 공용 요청 엔진 (RPM/TPM 예산 + 재시도 + 적응형 동시성)
+engine = get_engine(st.session_state.api_key, rpm=OPENAI_RPM, tpm=OPENAI_TPM)
+
 with st.sidebar:
     st.success("API 인증 성공")
 
@@ -330,7 +381,9 @@ st.sidebar.markdown(
 - 📂 **여러 문서를 한 번에 업로드**할 수 있습니다.
 - 🧠 문서는 **AI가 자동으로 주제별 분류**합니다.
 - 📁 폴더 수가 많으면 **자동으로 하위 폴더로 분해**됩니다.
+- 🌳 한 번 정리한 뒤에는 **새 문서만 기존 폴더에 배치**됩니다. (전체 다시 분류는 체크박스)
 - ⏳ 문서 수가 많을수록 처리 시간이 늘어납니다.
+- 🧵 정리는 **백그라운드 작업**으로 실행되어 버튼을 누르거나 새로고침해도 이어집니다.
 - 📦 완료 후 **ZIP 파일로 한 번에 다운로드**할 수 있습니다.
 """
 )
@@ -354,13 +407,15 @@ with left_col:
     if st.button("Upload File Reset", use_container_width=True):
         st.session_state.uploader_key += 1
         st.rerun()
+    full_recluster = st.checkbox("전체 다시 분류 (기존 폴더 트리 무시)", value=not ORGANIZE_INCREMENTAL)
     # ✅ 반드시 여기 안에서
     col2, col3 = st.columns([1, 1], gap="small")
 
     with col2:
         if st.button("Cache Reset", use_container_width=True):
-            reset_cache()
-            st.rerun()
+            if reset_cache():
+                st.rerun()
+            st.warning("실행 중인 작업이 끝난 뒤 초기화할 수 있습니다.")
             
     with col3:
         if st.button("Download Reset", use_container_width=True):
@@ -381,307 +436,141 @@ with right_col:
 progress_placeholder = st.empty()
 progress_text = st.empty()
 log_box = st.empty()
-logs = []
 
-def log(msg):
-    logs.append(msg)
+def show_logs(lines):
     log_box.markdown(
-        "<div class='log-box'>" + "<br>".join(logs[-10:]) + "</div>",
+        "<div class='log-box'>" + "<br>".join(lines) + "</div>",
         unsafe_allow_html=True,
     )
 
-def h(t: str):
-    return hashlib.sha256(t.encode("utf-8")).hexdigest()
-
 # ============================
-# ✨ 유틸
+# 🗂️ 문서 정리 파이프라인 (CLI 와 공용)
 # ============================
-def sanitize_folder_name(name: str) -> str:
-    name = (name or "").strip()
-    name = re.sub(r"[^\w가-힣\s]", "", name)
-    name = re.sub(r"\s+", "_", name)
-    return name.strip("_") or "기타_문서"
-
-def unique_folder_name(base: str, existing: set) -> str:
-    if base not in existing:
-        return base
-    i = 1
-    while f"{base}_{i}" in existing:
-        i += 1
-    return f"{base}_{i}"
-
-def title_from_filename(file_name: str) -> str:
-    base = file_name.rsplit(".", 1)[0]
-    base = re.sub(r"[_\-]+", " ", base)
-    base = re.sub(r"\s+", " ", base).strip()
-    return base
-
-# ----------------------------
-# 🧠 0차 GPT EXPAND
-# ----------------------------
-def expand_document_with_gpt(file):
-    key = h(file.name)
-    if key in expand_cache:
-        return expand_cache[key]
-
-    fallback_title = title_from_filename(file.name)
-
-    prompt = f"""
-다음 문서를 분류하기 쉽게 의미적으로 정규화하라.
-분류나 그룹핑은 하지 말고, 의미만 추출하라.
-
-출력은 반드시 JSON 하나만 출력한다.
-
-형식:
-{{
-  "canonical_title": "...",
-  "keywords": ["...", "..."],
-  "domain": "...",
-  "embedding_text": "..."
-}}
-
-문서 파일명:
-{file.name}
-"""
-
-    try:
-        r = openai.ChatCompletion.create(
-            model="gpt-5-nano",
-            messages=[
-                {"role": "system", "content": "너는 문서를 분류하기 쉽게 정규화하는 역할이다."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
-        data = json.loads(r["choices"][0]["message"]["content"])
-        if "embedding_text" not in data:
-            raise ValueError
-
-    except Exception:
-        data = {
-            "canonical_title": fallback_title,
-            "keywords": fallback_title.split(),
-            "domain": "기타",
-            "embedding_text": f"제목: {fallback_title}",
-        }
-
-    expand_cache[key] = data
-    save_cache(EXPAND_CACHE, expand_cache)
-    return data
-
-# ----------------------------
-# ⭐ 추가: 0차 EXPAND 병렬 처리
-# ----------------------------
-def expand_documents_parallel(files, max_workers=5):
-    results = {}
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(expand_document_with_gpt, f): f for f in files}
-        for future in as_completed(futures):
-            f = futures[future]
-            try:
-                results[f] = future.result()
-            except Exception:
-                fallback_title = title_from_filename(f.name)
-                results[f] = {
-                    "canonical_title": fallback_title,
-                    "keywords": fallback_title.split(),
-                    "domain": "기타",
-                    "embedding_text": f"제목: {fallback_title}",
-                }
-    return [results[f] for f in files]
-
-# ----------------------------
-# ✨ 임베딩
-# ----------------------------
-def embed_texts(texts):
-    missing = [t for t in texts if h(t) not in embedding_cache]
+pipeline_settings = PipelineSettings(
+    max_files_per_cluster=MAX_FILES_PER_CLUSTER,
+    max_recursion_depth=MAX_RECURSION_DEPTH,
+    hdbscan_min_cluster_size=HDBSCAN_MIN_CLUSTER_SIZE,
+    hdbscan_min_samples=HDBSCAN_MIN_SAMPLES,
+    cluster_single_fit=CLUSTER_SINGLE_FIT,
+    cluster_backend=CLUSTER_BACKEND,
+    organize_incremental=ORGANIZE_INCREMENTAL,
+    expand_model=EXPAND_MODEL,
+    embed_model=EMBED_MODEL,
+    folder_model=FOLDER_MODEL,
+    embed_dimensions=EMBED_DIMENSIONS,
+    expand_batch_size=EXPAND_BATCH_SIZE,
+    expand_batch_retries=EXPAND_BATCH_RETRIES,
+    extract_char_budget=EXTRACT_CHAR_BUDGET,
+    expand_excerpt_chars=EXPAND_EXCERPT_CHARS,
+    folder_combined_call=FOLDER_COMBINED_CALL,
+    readme_chunk_size=README_CHUNK_SIZE,
+)
 
-    if missing:
-        r = openai.Embedding.create(
-            model="text-embedding-3-large",
-            input=missing,
+def organize_job(files, full_recluster):
+    """작업 스레드에서 실행 — st.* 호출 없이 job 에만 진행률 / 로그 / 결과 ZIP 기록"""
+    def run(job):
+        pipeline = DocumentPipeline(
+            caches,
+            engine,
+            pipeline_settings,
+            log=job.log,
+            org_model_path=CACHE_DIR / "organization.npz",
         )
-        for t, d in zip(missing, r["data"]):
-            embedding_cache[h(t)] = d["embedding"]
-        save_cache(EMBED_CACHE, embedding_cache)
-
-    return [embedding_cache[h(t)] for t in texts]
+        job.log("[파일 업로드 완료]")
+
+        # 차원 축소 모델 (재)fit 은 실행 시작 시점에, 다른 작업이 실행 중이 아닐 때만
+        # → 실행 중인 작업의 벡터 공간이 도중에 바뀌지 않는다 (건너뛰면 다음 실행에서 fit)
+        if not runner.run_exclusive(job, caches.refresh_vectors):
+            job.log("[다른 작업 실행 중 → 차원 축소 모델 갱신은 다음 실행으로]")
+
+        # 실행당 1회만 expand / 임베딩 → 모든 깊이에서 같은 행렬 재사용
+        table = build_doc_table(files)
+        n_dupes = len(files) - len(table["files"])
+        if n_dupes:
+            job.log(f"[내용이 같은 파일 {n_dupes}개 병합]")
+
+        # 증분 배치 / 전체 분류 / 이전 결과 재사용은 파이프라인이 결정
+        folders, readmes, _ = pipeline.organize(table, full_recluster, job.progress)
+
+        # ZIP 을 작업 결과 파일에 바로 기록 (계획 순서대로 / 중복 업로드는 여기서 다시 펼침)
+        with open(job.result_path, "wb") as fp:
+            zip_writer = ZipStreamWriter(fileobj=fp)
+            for main_group, entries in folder_entries(table, folders, readmes):
+                for arcname, f in entries:
+                    zip_writer.add(arcname, f.getvalue())
+                job.log(f"{main_group} 처리 완료")
+            zip_writer.close()
+
+        job.log("모든 문서 정리 완료")
+    return run
 
 # ----------------------------
-# 📦 클러스터링
+# 🚀 작업 제출
 # ----------------------------
-def cluster_documents(files):
-    # ⭐ 변경: 0차 EXPAND 병렬 적용
-    expanded = expand_documents_parallel(files, max_workers=5)
-    vectors = embed_texts([e["embedding_text"] for e in expanded])
-    return HDBSCAN(min_cluster_size=3, min_samples=1).fit_predict(vectors)
-
-# ----------------------------
-# 🔁 자동 재분해
-# ----------------------------
-def recursive_cluster(files, depth=0):
-    if len(files) <= MAX_FILES_PER_CLUSTER or depth >= MAX_RECURSION_DEPTH:
-        return [files]
-
-    labels = cluster_documents(files)
-    groups = {}
-    for f, l in zip(files, labels):
-        groups.setdefault(l, []).append(f)
-
-    result = []
-    for g in groups.values():
-        if len(g) > MAX_FILES_PER_CLUSTER:
-            result.extend(recursive_cluster(g, depth + 1))
-        else:
-            result.append(g)
-
-    return result
-
-# ----------------------------
-# ✨ GPT 폴더명 / README
-# ----------------------------
-def generate_group_name(names):
-    k = h("||".join(sorted(names)))
-    if k in group_cache:
-        return group_cache[k]
-
-    prompt = """
-다음 문서 제목들의 공통 주제를 대표하는
-짧고 명확한 한글 폴더명 하나만 출력하세요.
-
-규칙:
-- 2~4 단어
-- 조사 사용 금지
-- 숫자/번호 금지
-- 설명 금지
-"""
+uploaded_files = [f for f in uploaded_files or [] if f and f.name.strip()]
 
-    r = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "너는 한글 폴더명만 생성한다."},
-            {"role": "user", "content": prompt + "\n" + "\n".join(names)},
-        ],
-        temperature=0.3,
-    )
-
-    name = sanitize_folder_name(r["choices"][0]["message"]["content"])
-    group_cache[k] = name
-    save_cache(GROUP_CACHE, group_cache)
-    return name
-
-def generate_readme(topic, files, auto_split=False):
-    k = h(("split" if auto_split else "nosplit") + topic + "||" + "||".join(sorted(files)))
-    if k in readme_cache:
-        return readme_cache[k]
-
-    notice = AUTO_SPLIT_NOTICE if auto_split else ""
-
-    prompt = f"""
-{notice}다음 문서들은 '{topic}' 주제로 분류된 자료입니다.
-각 문서의 관계와 활용 목적을 설명하는 README.md를 작성하세요.
-반드시 한국어로 작성하세요.
-
-문서 목록:
-{chr(10).join(files)}
-"""
-
-    r = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "너는 한국어로만 README를 작성한다."},
-            {"role": "user", "content": prompt},
-        ],
+if uploaded_files:
+    # 같은 업로드는 rerun 마다 다시 제출하지 않는다 (업로더 초기화 후 다시 올리면 새 작업)
+    upload_key = json.dumps(
+        [st.session_state.uploader_key, [[f.name, f.size] for f in uploaded_files], full_recluster]
     )
-
-    content = notice + r["choices"][0]["message"]["content"].strip()
-    readme_cache[k] = content
-    save_cache(README_CACHE, readme_cache)
-    return content
+    job = runner.find(job_owner, upload_key)
+    if job is None:
+        # 실패한 업로드는 자동으로 다시 제출하지 않는다 (같은 오류로 rerun 마다 API 호출 반복)
+        # → [ Retry ] 를 눌렀을 때만 새 작업
+        job = next((j for j in runner.jobs(job_owner) if j.key == upload_key and j.status == "failed"), None)
+        if job is not None and st.session_state.pop("retry_job", None) == job.id:
+            job = None
+    if job is None:
+        # 업로드 내용을 작업 쪽으로 복사 → 업로더 상태가 바뀌어도 작업은 그대로
+        files = [LocalFile(f.name, f.getvalue()) for f in uploaded_files]
+        job = runner.submit(
+            organize_job(files, full_recluster),
+            owner=job_owner,
+            key=upload_key,
+            title=f"문서 {len(files)}개",
+        )
+    st.session_state.job_id = job.id
 
 # ----------------------------
-# 🚀 메인 처리
+# 📡 작업 상태 (폴링)
 # ----------------------------
-if uploaded_files:
-    uploaded_files = [f for f in uploaded_files if f and f.name.strip()]
-    if not uploaded_files:
-        st.stop()
+job = runner.get(st.session_state.get("job_id")) or next(iter(runner.jobs(job_owner)), None)
 
-    # ▶ 실행 시 결과 폴더 자동 초기화
-    reset_output()
-
-    output_dir = Path("output_docs")
-    output_dir.mkdir(exist_ok=True)
-
-    progress = progress_placeholder.progress(0)
+if job is None:
+    progress_placeholder.progress(0)
     progress_text.markdown("<div class='status-bar'>[0%]</div>", unsafe_allow_html=True)
-    log("[파일 업로드 완료]")
-
-    top_clusters = recursive_cluster(uploaded_files)
-    total = len(top_clusters)
-    done = 0
-
-    for cluster_files in top_clusters:
-        main_group = generate_group_name([f.name.rsplit(".", 1)[0] for f in cluster_files])
-        main_folder = output_dir / main_group
-        main_folder.mkdir(parents=True, exist_ok=True)
-
-        readme_filename = f"★README_{main_group}.md"
-
-        (main_folder / readme_filename).write_text(
-            generate_readme(main_group, [f.name for f in cluster_files]),
-            encoding="utf-8",
-        )
-
-        used_names = set()
-        for sub_files in recursive_cluster(cluster_files):
-            base = generate_group_name([f.name.rsplit(".", 1)[0] for f in sub_files])
-            sub_group = unique_folder_name(base, used_names)
-            used_names.add(sub_group)
-
-            sub_folder = main_folder / sub_group
-            sub_folder.mkdir(parents=True, exist_ok=True)
-
-            for f in sub_files:
-                (sub_folder / f.name).write_bytes(f.getvalue())
-
-            readme_filename = f"★README_{sub_group}.md"
-
-            (sub_folder / readme_filename).write_text(
-                generate_readme(f"{main_group} - {sub_group}", [f.name for f in sub_files]),
-                encoding="utf-8",
-            )
+    log_box.markdown("<div class='log-box'>......</div>", unsafe_allow_html=True)
+else:
+    progress_placeholder.progress(job.percent)
+
+    if job.status == "queued":
+        status = f"| 대기 중… | [ 앞선 작업 {runner.queued_before(job)}개 ]"
+    elif job.status == "running":
+        status = f"| 정리 중… | [ {job.percent}%  ({job.done} / {job.goal or '?'} file) ]"
+    elif job.status == "done":
+        status = "[100% complete]"
+    else:
+        status = f"[{job.status}] {job.error or ''}"
+    progress_text.markdown(f"<div class='status-bar'>{status}</div>", unsafe_allow_html=True)
+    show_logs(job.tail(10) or ["......"])
+
+    if job.status == "failed" and uploaded_files:   # 다시 제출할 업로드가 남아 있을 때만
+        if zip_placeholder.button("[ Retry ]", use_container_width=True, key="job_retry"):
+            st.session_state.retry_job = job.id
+            st.rerun()
 
-        done += 1
-        pct = int(done / total * 100)
-        progress.progress(pct)
-        progress_text.markdown(
-            f"<div class='status-bar'>| 정리 중… | [ {pct}%  ({done} / {total} file) ]</div>",
-            unsafe_allow_html=True
+    if job.status == "done" and job.result_path.exists():
+        zip_placeholder.download_button(
+            "[ Download ]",
+            job.result_path.read_bytes(),
+            file_name="result_documents.zip",
+            mime="application/zip",
+            use_container_width=True,
+            key="zip_download",
         )
-        log(f"{main_group} 처리 완료")
-
-    zip_path = Path("result_documents.zip")
-    with zipfile.ZipFile(zip_path, "w") as z:
-        for root, _, files in os.walk(output_dir):
-            for f in files:
-                p = os.path.join(root, f)
-                z.write(p, arcname=os.path.relpath(p, output_dir))
- 
-    zip_placeholder.download_button(
-        "[ Download ]",
-        open("result_documents.zip", "rb"),
-        file_name="result_documents.zip",
-        mime="application/zip",
-        use_container_width=True,
-        key="zip_download",
-    )
 
-    progress.progress(100)
-    progress_text.markdown("<div class='status-bar'>[100% complete]</div>", unsafe_allow_html=True)
-    log("모든 문서 정리 완료")
-
-else:
-    progress_placeholder.progress(0)
-    progress_text.markdown("<div class='status-bar'>[0%]</div>", unsafe_allow_html=True)
-    log_box.markdown("<div class='log-box'>......</div>", unsafe_allow_html=True)
+    # 작업이 끝날 때까지 상태만 다시 읽는다 (작업 자체는 rerun 과 무관하게 계속 실행)
+    if job.active:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
@@ -0,0 +1,232 @@
+# AI DAZY benchmarks
+#
+#   python dazy_bench.py reduce --n 2000 --clusters 40
+#   python dazy_bench.py reduce --cache .cache        (캐시된 실제 임베딩 사용)
+#   python dazy_bench.py cluster --n 20000 --dim 256
+#   python dazy_bench.py match --n 100000 --categories 200 --subtopics 25
+
+import argparse
+import json
+import time
+
+import numpy as np
+from hdbscan import HDBSCAN
+from sklearn.metrics import adjusted_rand_score
+
+from dazy_cache import EmbeddingStore
+from dazy_cluster import make_backend, select_backend
+from dazy_match import routed_match, topk_match
+from dazy_reduce import Reducer
+
+
+# ============================
+# 🧪 데이터
+# ============================
+def synthetic_corpus(n=2000, clusters=40, dim=3072, spread=0.6, seed=0):
+    """단위 구 위의 중심 + 가우시안 노이즈 → L2 정규화 (OpenAI 임베딩과 같은 단위 벡터)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    truth = rng.integers(0, clusters, size=n)
+    X = centers[truth] + rng.normal(scale=spread / np.sqrt(dim), size=(n, dim))
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    return X.astype(np.float32), truth
+
+
+def load_corpus(args):
+    if args.cache:
+        X = np.asarray(EmbeddingStore(args.cache, dtype=args.dtype).matrix, dtype=np.float32)
+        if args.n and len(X) > args.n:
+            X = X[np.random.default_rng(args.seed).choice(len(X), size=args.n, replace=False)]
+        return X, None
+    return synthetic_corpus(args.n, args.clusters, args.dim, args.spread, args.seed)
+
+
+def timed(fn, *a, **kw):
+    t = time.perf_counter()
+    out = fn(*a, **kw)
+    return out, time.perf_counter() - t
+
+
+def hdbscan_labels(X):
+    return HDBSCAN(min_cluster_size=3, min_samples=1).fit_predict(X)
+
+
+# ============================
+# 📉 차원 축소 안정성
+# ============================
+def bench_reduce(args):
+    X, truth = load_corpus(args)
+    full_labels, full_s = timed(hdbscan_labels, X)
+    report = {
+        "n": len(X),
+        "dim": X.shape[1],
+        "full": {"cluster_s": round(full_s, 3), "bytes": X.nbytes, "clusters": int(full_labels.max() + 1)},
+    }
+    if truth is not None:
+        report["full"]["ari_vs_truth"] = round(adjusted_rand_score(truth, full_labels), 4)
+
+    # 매칭: 문서 → 가장 가까운 "주제" (전체 차원 클러스터 중심을 주제로 사용)
+    centers = [X[full_labels == c].mean(axis=0) for c in range(full_labels.max() + 1)]
+    topics = np.stack(centers) if centers else X[:64].copy()
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    full_match = np.argmax(X @ topics.T, axis=1)
+
+    for method in args.methods:
+        for d in args.dims:
+            reducer, fit_s = timed(Reducer.fit, X, method=method, dim=d)
+            Y, tr_s = timed(reducer.transform, X)
+            labels, cl_s = timed(hdbscan_labels, Y)
+            match = np.argmax(Y @ reducer.transform(topics).T, axis=1)
+            row = {
+                "fit_s": round(fit_s, 3),
+                "transform_s": round(tr_s, 3),
+                "cluster_s": round(cl_s, 3),
+                "bytes": Y.nbytes,
+                "clusters": int(labels.max() + 1),
+                "ari_vs_full": round(adjusted_rand_score(full_labels, labels), 4),
+                "match_agreement": round(float(np.mean(match == full_match)), 4),
+            }
+            if truth is not None:
+                row["ari_vs_truth"] = round(adjusted_rand_score(truth, labels), 4)
+            report[f"{method}{d}"] = row
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+# ============================
+# 🔌 클러스터링 백엔드 비교
+# ============================
+def split_recursive(X, idx, choose, max_size, max_depth, depth=0):
+    """AI DAZY document.py 의 recursive_cluster 와 같은 분해 규칙"""
+    if len(idx) <= max_size or depth >= max_depth:
+        return [idx]
+
+    labels = make_backend(choose(len(idx), depth)).fit_predict(X[idx], max_size)
+    groups = {}
+    for i, l in zip(idx, labels):
+        groups.setdefault(l, []).append(i)
+
+    result = []
+    for g in groups.values():
+        g = np.asarray(g)
+        if len(g) > max_size:
+            result.extend(split_recursive(X, g, choose, max_size, max_depth, depth + 1))
+        else:
+            result.append(g)
+    return result
+
+
+def bench_cluster(args):
+    X, truth = load_corpus(args)
+    report = {"n": len(X), "dim": X.shape[1], "max_files_per_cluster": args.max_size}
+
+    for name in args.backends:
+        if name == "auto":
+            choose = lambda n, depth: select_backend(n, depth, args.max_size)
+        else:
+            choose = lambda n, depth, name=name: name
+
+        groups, secs = timed(split_recursive, X, np.arange(len(X)), choose, args.max_size, args.max_depth)
+        sizes = np.array([len(g) for g in groups])
+        row = {
+            "wall_s": round(secs, 3),
+            "folders": len(groups),
+            "size_max": int(sizes.max()),
+            "size_median": float(np.median(sizes)),
+            "size_p90": float(np.percentile(sizes, 90)),
+            "oversized": int((sizes > args.max_size).sum()),
+            "singletons": int((sizes == 1).sum()),
+        }
+        if truth is not None:
+            labels = np.empty(len(X), dtype=int)
+            for k, g in enumerate(groups):
+                labels[g] = k
+            row["ari_vs_truth"] = round(adjusted_rand_score(truth, labels), 4)
+        report[name] = row
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+# ============================
+# 🧭 2단계 라우팅 매칭
+# ============================
+def synthetic_taxonomy(n, categories, subtopics, dim, spread, seed=0):
+    """카테고리 중심 → 하위 주제 → 문서 순으로 노이즈를 더한 계층형 데이터"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(categories, dim))
+    groups = np.repeat(np.arange(categories), subtopics)
+    topics = centers[groups] + rng.normal(scale=0.7, size=(len(groups), dim))
+    docs = topics[rng.integers(0, len(groups), size=n)] + rng.normal(scale=spread, size=(n, dim))
+    return docs.astype(np.float32), topics.astype(np.float32), groups
+
+
+def bench_match(args):
+    docs, topics, groups = synthetic_taxonomy(
+        args.n, args.categories, args.subtopics, args.dim, args.spread, args.seed,
+    )
+    (exhaustive, _), full_s = timed(topk_match, docs, topics)
+    report = {
+        "n": len(docs),
+        "topics": len(topics),
+        "categories": args.categories,
+        "exhaustive_s": round(full_s, 3),
+    }
+
+    for route_k in args.route_k:
+        for margin in args.margins:
+            margin = None if margin < 0 else margin
+            (best, _, fallback), secs = timed(routed_match, docs, topics, groups, route_k=route_k, margin=margin)
+            report[f"route{route_k}_margin{margin}"] = {
+                "wall_s": round(secs, 3),
+                "speedup": round(full_s / secs, 2),
+                "agreement": round(float(np.mean(best == exhaustive[:, 0])), 4),
+                "fallback_rate": round(float(fallback.mean()), 4),
+            }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+# ============================
+# 🚀 CLI
+# ============================
+def main():
+    p = argparse.ArgumentParser(description="AI DAZY benchmarks")
+    sub = p.add_subparsers(dest="bench", required=True)
+
+    def corpus_args(sp):
+        sp.add_argument("--cache", help="캐시 디렉터리 (지정 시 실제 임베딩 사용)")
+        sp.add_argument("--dtype", default="float32")
+        sp.add_argument("--n", type=int, default=2000)
+        sp.add_argument("--clusters", type=int, default=40)
+        sp.add_argument("--dim", type=int, default=3072)
+        sp.add_argument("--spread", type=float, default=0.6)
+        sp.add_argument("--seed", type=int, default=0)
+
+    r = sub.add_parser("reduce", help="차원 축소 전/후 클러스터링·매칭 시간과 배정 안정성")
+    corpus_args(r)
+    r.add_argument("--methods", nargs="+", default=["pca", "random"])
+    r.add_argument("--dims", nargs="+", type=int, default=[128, 256])
+
+    c = sub.add_parser("cluster", help="백엔드별 재분해 시간과 폴더 크기 분포")
+    corpus_args(c)
+    c.add_argument("--backends", nargs="+", default=["auto", "hdbscan", "kmeans", "agglomerative"])
+    c.add_argument("--max-size", type=int, default=25)
+    c.add_argument("--max-depth", type=int, default=2)
+
+    m = sub.add_parser("match", help="2단계 라우팅 매칭의 속도 향상과 전수 비교 대비 일치율")
+    m.add_argument("--n", type=int, default=100000)
+    m.add_argument("--categories", type=int, default=200)
+    m.add_argument("--subtopics", type=int, default=25)
+    m.add_argument("--dim", type=int, default=256)
+    m.add_argument("--spread", type=float, default=4.0)
+    m.add_argument("--seed", type=int, default=0)
+    m.add_argument("--route-k", nargs="+", type=int, default=[1, 3, 5])
+    m.add_argument("--margins", nargs="+", type=float, default=[-1, 0.02, 0.05], help="음수 = 폴백 없음")
+
+    args = p.parse_args()
+    {"reduce": bench_reduce, "cluster": bench_cluster, "match": bench_match}[args.bench](args)
+
+
+if __name__ == "__main__":
+    main()
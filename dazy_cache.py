@@ -0,0 +1,462 @@
+# AI DAZY cache layer
+
+import atexit
+import json
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # Windows: 프로세스 간 잠금 없음 → 스토어 디렉터리는 프로세스 1개 전용
+    fcntl = None
+
+
+# ============================
+# 🧠 임베딩 스토어 (mmap 행렬)
+# ============================
+class EmbeddingStore:
+    """sha256 → 행 번호 인덱스 + float32(옵션 float16) 행렬 파일 기반 임베딩 캐시
+
+    - 행렬 파일은 append-only 로만 기록되고, 읽기는 np.memmap 으로 zero-copy
+    - 인덱스 파일은 한 줄에 해시 하나 (줄 번호 = 행 번호)
+    - 비정상 종료로 행렬/인덱스 길이가 어긋나면 짧은 쪽에 맞춰 잘라낸다
+    - 여러 프로세스가 같은 디렉터리를 써도 된다: 로드 / 추가는 파일 잠금(fcntl) 안에서 하고,
+      추가 전에 디스크의 인덱스가 바뀌었으면 다시 읽어 행 번호를 맞춘다
+      (fcntl 이 없는 플랫폼은 프로세스 1개 전용)
+    """
+
+    def __init__(self, directory, name="embeddings", dtype="float32"):
+        self.dir = Path(directory)
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.matrix_path = self.dir / f"{name}.{self.dtype.name}.bin"
+        self.index_path = self.dir / f"{name}.{self.dtype.name}.idx"
+        self.meta_path = self.dir / f"{name}.{self.dtype.name}.meta.json"
+        self.lock_path = self.dir / f"{name}.{self.dtype.name}.lock"
+        self._lock = threading.RLock()
+        self._load()
+
+    # ----------------------------
+    # 로드 / 복구
+    # ----------------------------
+    @contextmanager
+    def _file_lock(self):
+        """프로세스 간 잠금 (같은 스토어 파일을 읽고 고쳐 쓰는 구간)"""
+        if fcntl is None or not self.dir.exists():
+            yield
+            return
+        with open(self.lock_path, "a") as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def _index_size(self):
+        return self.index_path.stat().st_size if self.index_path.exists() else 0
+
+    def _load(self):
+        with self._lock, self._file_lock():
+            self._read()
+
+    def _read(self):
+        self._index = {}
+        self._keys = []
+        self._dim = None
+        self._mm = None
+        self._index_bytes = 0
+
+        if self.meta_path.exists():
+            try:
+                self._dim = int(json.loads(self.meta_path.read_text(encoding="utf-8"))["dim"])
+            except Exception:
+                self._dim = None
+
+        if self._dim is None or not self.index_path.exists() or not self.matrix_path.exists():
+            self._reset_files()
+            return
+
+        keys = [k for k in self.index_path.read_text(encoding="utf-8").split("\n") if k]
+        rows = self.matrix_path.stat().st_size // self._row_bytes
+        n = min(len(keys), rows)
+
+        # 어긋난 꼬리 정리 (쓰기 도중 중단된 경우)
+        if rows * self._row_bytes != self.matrix_path.stat().st_size or rows != n:
+            os.truncate(self.matrix_path, n * self._row_bytes)
+        if len(keys) != n:
+            keys = keys[:n]
+            self.index_path.write_text("".join(k + "\n" for k in keys), encoding="utf-8")
+
+        self._keys = keys
+        self._index = {k: i for i, k in enumerate(keys)}
+        self._index_bytes = self._index_size()
+
+    def _reset_files(self):
+        for p in (self.matrix_path, self.index_path, self.meta_path):
+            if p.exists():
+                p.unlink()
+        self._index = {}
+        self._keys = []
+        self._dim = None
+        self._mm = None
+        self._index_bytes = 0
+
+    @property
+    def _row_bytes(self):
+        return self._dim * self.dtype.itemsize
+
+    # ----------------------------
+    # 조회
+    # ----------------------------
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def dim(self):
+        return self._dim
+
+    @property
+    def matrix(self):
+        """전체 행렬 (n, dim) memmap 뷰"""
+        with self._lock:
+            n = len(self._keys)
+            if n == 0:
+                return np.empty((0, self._dim or 0), dtype=self.dtype)
+            if self._mm is None or self._mm.shape[0] != n:
+                self._mm = np.memmap(self.matrix_path, dtype=self.dtype, mode="r", shape=(n, self._dim))
+            return self._mm
+
+    def __getitem__(self, key):
+        return self.matrix[self._index[key]]
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else self.matrix[i]
+
+    def rows(self, keys):
+        """키 목록 → 행 번호 배열"""
+        return np.fromiter((self._index[k] for k in keys), dtype=np.int64, count=len(keys))
+
+    def take(self, keys):
+        """키 순서대로 (len(keys), dim) float32 배열 반환"""
+        keys = list(keys)
+        if not keys:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        return self.matrix[self.rows(keys)].astype(np.float32, copy=False)
+
+    # ----------------------------
+    # 기록 (append-only)
+    # ----------------------------
+    def add(self, keys, vectors):
+        """새 벡터를 행렬 끝에 추가 (이미 있는 키는 무시)"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock():
+            # 다른 프로세스가 추가 / 초기화했으면 디스크 기준으로 다시 읽는다 (행 번호 = 인덱스 줄 번호)
+            if self._index_size() != self._index_bytes:
+                self._read()
+            # 다른 프로세스가 행렬만 쓰고 중단된 꼬리는 잘라낸 뒤 append
+            if self._dim is not None and self.matrix_path.exists():
+                if self.matrix_path.stat().st_size != len(self._keys) * self._row_bytes:
+                    os.truncate(self.matrix_path, len(self._keys) * self._row_bytes)
+
+            fresh = {}
+            for k, v in zip(keys, vectors):
+                if k not in self._index and k not in fresh:
+                    fresh[k] = v
+            if not fresh:
+                return
+
+            arr = np.asarray(list(fresh.values()), dtype=self.dtype)
+            if arr.ndim != 2:
+                raise ValueError("embedding vectors must be 2-D")
+
+            if self._dim is None:
+                self._dim = int(arr.shape[1])
+                self.meta_path.write_text(
+                    json.dumps({"dim": self._dim, "dtype": self.dtype.name}), encoding="utf-8"
+                )
+            elif arr.shape[1] != self._dim:
+                raise ValueError(f"embedding dim mismatch: {arr.shape[1]} != {self._dim}")
+
+            # 행렬 먼저 → 인덱스 나중 (중단 시 인덱스 없는 행은 로드 때 잘려 나감)
+            with open(self.matrix_path, "ab") as fp:
+                fp.write(arr.tobytes())
+                fp.flush()
+                os.fsync(fp.fileno())
+            with open(self.index_path, "a", encoding="utf-8") as fp:
+                fp.write("".join(k + "\n" for k in fresh))
+
+            start = len(self._keys)
+            for i, k in enumerate(fresh):
+                self._index[k] = start + i
+            self._keys.extend(fresh)
+            self._index_bytes = self._index_size()
+            self._mm = None
+
+    def __setitem__(self, key, vector):
+        self.add([key], [vector])
+
+    def clear(self):
+        with self._lock, self._file_lock():
+            self._mm = None
+            self._reset_files()
+
+    # ----------------------------
+    # 기존 JSON 캐시 이관
+    # ----------------------------
+    def migrate_json(self, p):
+        """예전 embeddings.json({hash: [float, ...]}) 을 읽어 행렬로 옮기고 삭제"""
+        p = Path(p)
+        if not p.exists():
+            return 0
+        try:
+            legacy = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            legacy = {}
+        if legacy:
+            self.add(list(legacy.keys()), list(legacy.values()))
+        p.unlink()
+        return len(legacy)
+
+
+# ============================
+# 📒 Journal 캐시 (expand / group / README)
+# ============================
+_CLEAR = object()
+
+
+class JournalCache:
+    """dict 호환 캐시. 항목마다 한 줄(JSONL)을 append 하고 디스크 기록은 단일 writer 스레드가 담당
+
+    - __setitem__ 은 메모리 갱신 + 큐 적재만 하므로 O(1), 호출 스레드는 디스크를 기다리지 않는다
+    - writer 는 flush_every 개 또는 flush_interval 초마다 한 번에 append + fsync
+    - 중복 줄이 살아있는 항목의 compact_ratio 배를 넘으면 writer 가 임시 파일로
+      압축본을 만든 뒤 os.replace 로 원자적으로 교체
+    - 마지막 줄이 잘린 경우(쓰기 중 중단)는 로드 시 건너뛴다
+    """
+
+    def __init__(self, path, legacy=None, flush_every=64, flush_interval=0.5, compact_ratio=2.0):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.compact_ratio = compact_ratio
+        self._data = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._load()
+        if legacy is not None:
+            self._migrate(Path(legacy))
+        self._writer = threading.Thread(target=self._run, name=f"journal:{self.path.name}", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    # ----------------------------
+    # 로드 / 이관
+    # ----------------------------
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as fp:
+            for line in fp:
+                try:
+                    rec = json.loads(line)
+                    self._data[rec["k"]] = rec["v"]
+                except Exception:
+                    continue
+                self._lines += 1
+
+    def _migrate(self, p):
+        """예전 {key: value} JSON 캐시를 journal 로 옮기고 삭제"""
+        if not p.exists():
+            return
+        try:
+            legacy = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            legacy = {}
+        for k, v in legacy.items():
+            self._data.setdefault(k, v)
+        self._compact()
+        p.unlink()
+
+    # ----------------------------
+    # dict 인터페이스
+    # ----------------------------
+    def __contains__(self, key):
+        return key in self._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+        self._queue.put((key, value))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        self._queue.put(_CLEAR)
+
+    def flush(self, timeout=None):
+        """큐에 쌓인 기록이 디스크에 반영될 때까지 대기"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    # ----------------------------
+    # writer 스레드
+    # ----------------------------
+    def _run(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) < self.flush_every:
+                    continue
+
+            self._append(batch)
+            batch = []
+
+            if item is _CLEAR:
+                self._truncate()
+            elif isinstance(item, threading.Event):
+                item.set()
+
+            if self._lines > max(self.flush_every, self.compact_ratio * len(self._data)):
+                self._compact()
+
+    def _append(self, batch):
+        if not batch:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fp:
+                fp.write("".join(json.dumps({"k": k, "v": v}, ensure_ascii=False) + "\n" for k, v in batch))
+                fp.flush()
+                os.fsync(fp.fileno())
+            self._lines += len(batch)
+        except Exception:
+            pass
+
+    def _truncate(self):
+        try:
+            if self.path.exists():
+                self.path.unlink()
+        except Exception:
+            pass
+        self._lines = 0
+
+    def _compact(self):
+        with self._lock:
+            snapshot = list(self._data.items())
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fp:
+                fp.write("".join(json.dumps({"k": k, "v": v}, ensure_ascii=False) + "\n" for k, v in snapshot))
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp, self.path)
+            self._lines = len(snapshot)
+        except Exception:
+            pass
+
+
+# ============================
+# 🗄️ 프로세스 공용 캐시 (싱글톤)
+# ============================
+class CacheSet:
+    """한 캐시 디렉터리의 임베딩 / 폴더명 / README / expand 캐시 묶음"""
+
+    def __init__(self, directory, embed_dtype="float32", embed_dims=None, reduce=None, reduce_dim=256):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+
+        # API 에 요청한 차원 수가 다르면 별도 행렬 파일
+        name = f"embeddings.d{embed_dims}" if embed_dims else "embeddings"
+        self.embeddings = EmbeddingStore(self.dir, name=name, dtype=embed_dtype)
+        if not embed_dims:
+            # 예전 JSON 캐시(3072차원)는 최초 1회 이관 후 삭제
+            self.embeddings.migrate_json(self.dir / "embeddings.json")
+
+        # 클러스터링 / 매칭에 쓰는 벡터 (축소 설정 시 PCA / random projection 캐시)
+        self.vectors = self.embeddings
+        if reduce:
+            from dazy_reduce import ReducedStore
+
+            self.vectors = ReducedStore(self.embeddings, self.dir, method=reduce, dim=reduce_dim)
+
+        self.group = JournalCache(self.dir / "group_names.jsonl", legacy=self.dir / "group_names.json")
+        self.readme = JournalCache(self.dir / "readmes.jsonl", legacy=self.dir / "readmes.json")
+        self.expand = JournalCache(self.dir / "expands.jsonl", legacy=self.dir / "expands.json")
+        self.extracts = JournalCache(self.dir / "extracts.jsonl")
+        self.runs = JournalCache(self.dir / "runs.jsonl")
+
+    def refresh_vectors(self):
+        """실행 시작 시 호출 — 축소 모델을 (재)fit 할 시점이면 fit"""
+        if self.vectors is not self.embeddings:
+            self.vectors.refresh()
+
+    def vector_space(self):
+        """매칭 / 클러스터링 벡터 공간 식별자 (임베딩 행렬 이름 + 축소 모델 지문)"""
+        if self.vectors is not self.embeddings and self.vectors.reducer is not None:
+            return f"{self.embeddings.name}.{self.vectors.reducer.method}.{self.vectors.reducer.fingerprint}"
+        return self.embeddings.name
+
+    def reset(self):
+        """디스크 + 메모리 캐시 전체 초기화 (모든 세션에 즉시 반영)"""
+        with self.lock, self.embeddings._lock:
+            for c in (self.group, self.readme, self.expand, self.extracts, self.runs):
+                c.clear()
+                c.flush()
+            if self.vectors is not self.embeddings:
+                self.vectors.clear()
+            self.embeddings.clear()
+            if self.dir.exists():
+                shutil.rmtree(self.dir)
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+
+_CACHE_SETS = {}
+_CACHE_SETS_LOCK = threading.Lock()
+
+
+def get_caches(directory=".cache", embed_dtype="float32", embed_dims=None, reduce=None, reduce_dim=256):
+    """프로세스당 한 번만 로드되는 CacheSet 반환
+
+    Streamlit 은 위젯 조작마다 스크립트를 다시 실행하지만 import 된 모듈은
+    sys.modules 에 남으므로, 여기 보관한 CacheSet 은 rerun / 세션 간에 공유된다.
+    """
+    key = (str(Path(directory).resolve()), np.dtype(embed_dtype).name, embed_dims, reduce, reduce_dim)
+    with _CACHE_SETS_LOCK:
+        if key not in _CACHE_SETS:
+            _CACHE_SETS[key] = CacheSet(
+                directory,
+                embed_dtype=embed_dtype,
+                embed_dims=embed_dims,
+                reduce=reduce,
+                reduce_dim=reduce_dim,
+            )
+        return _CACHE_SETS[key]
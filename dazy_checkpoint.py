@@ -0,0 +1,101 @@
+# AI DAZY run checkpoints
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+# ============================
+# 💾 실행 체크포인트
+# ============================
+class RunCheckpoint:
+    """한 실행(같은 입력 + 같은 설정) 의 단계별 결과를 run 디렉터리에 저장
+
+    - 단계마다 파일 하나 (JSON / npz), 임시 파일 → os.replace 로 교체하므로 있으면 완성본
+    - 문서는 행 번호가 아닌 content hash 로 저장 → 업로드 순서 / 파일명이 달라도 재사용
+    - 실행이 끝나면 remove() — 완료된 결과는 실행 메모(runs.jsonl) 가 맡는다
+    - directory=None 이면 저장하지 않는다 (항상 compute)
+    """
+
+    def __init__(self, directory=None):
+        self.dir = Path(directory) if directory else None
+
+    def _path(self, stage, suffix=".json"):
+        return self.dir / f"{stage}{suffix}" if self.dir is not None else None
+
+    def _replace(self, p, write):
+        if self.dir is None:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        with open(tmp, "wb") as fp:
+            write(fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, p)
+
+    # ----------------------------
+    # JSON 단계
+    # ----------------------------
+    def get(self, stage, default=None):
+        if self.dir is None:
+            return default
+        p = self._path(stage)
+        if not p.exists():
+            return default
+        try:
+            return json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return default
+
+    def put(self, stage, value):
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._replace(self._path(stage), lambda fp: fp.write(data))
+
+    def by_hash(self, stage, hashes, compute):
+        """문서별 값 목록 — 저장돼 있으면 읽고, 없으면 compute() 후 {hash: 값} 으로 저장"""
+        saved = self.get(stage)
+        if saved is not None and all(ch in saved for ch in hashes):
+            return [saved[ch] for ch in hashes]
+        values = compute()
+        self.put(stage, dict(zip(hashes, values)))
+        return values
+
+    # ----------------------------
+    # 행렬 단계
+    # ----------------------------
+    def matrix(self, stage, hashes, compute):
+        """(문서 수, dim) 행렬 — 저장돼 있으면 hash 순서로 다시 맞춰 읽기"""
+        p = self._path(stage, ".npz")
+        if p is not None and p.exists():
+            try:
+                z = np.load(p)
+                row_of = {ch: i for i, ch in enumerate(z["hashes"].tolist())}
+                return z["matrix"][[row_of[ch] for ch in hashes]]
+            except Exception:
+                pass
+        matrix = compute()
+        self._replace(p, lambda fp: np.savez(fp, hashes=np.array(hashes), matrix=matrix))
+        return matrix
+
+    # ----------------------------
+    # 정리
+    # ----------------------------
+    def remove(self):
+        if self.dir is not None:
+            shutil.rmtree(self.dir, ignore_errors=True)
+
+    @staticmethod
+    def prune(root, max_age_days=7):
+        """끝나지 않은 채 오래된 run 디렉터리 삭제"""
+        root = Path(root)
+        if not root.exists():
+            return
+        cutoff = time.time() - max_age_days * 86400
+        for d in root.iterdir():
+            if d.is_dir() and d.stat().st_mtime < cutoff:
+                shutil.rmtree(d, ignore_errors=True)
@@ -0,0 +1,173 @@
+# AI DAZY headless batch CLI
+#
+#   OPENAI_API_KEY=sk-... python dazy_cli.py ./docs ./organized
+#   python dazy_cli.py uploads.zip ./organized --shards 4
+#   python dazy_cli.py ./docs ./organized --resume       (중단된 실행 이어서, 이미 기록된 파일은 건너뜀)
+#
+# 정리 단계는 Streamlit 앱과 같은 DocumentPipeline. 캐시는 별도 디렉터리(.cache-cli) 를 쓴다
+# (expand / 폴더명 / README journal 캐시는 프로세스 1개만 기록 → 앱이 실행 중인 .cache 를 지정하지 말 것).
+# 진행 로그는 표준 오류, 마지막 요약(JSON) 은 표준 출력으로.
+
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from dazy_cache import get_caches
+from dazy_llm import LLMEngine
+from dazy_pipeline import (
+    DocumentPipeline,
+    LocalFile,
+    PipelineSettings,
+    build_doc_table,
+    folder_entries,
+)
+
+SUFFIXES = {".md", ".pdf", ".txt"}
+
+
+# ============================
+# 📁 입력 (디렉터리 / ZIP)
+# ============================
+def load_inputs(src):
+    """디렉터리(하위 포함) 또는 ZIP → LocalFile 목록. 파일명이 겹치면 _1, _2 … 를 붙인다"""
+    src = Path(src)
+    found = []   # [(파일명, LocalFile 인자), ...]
+    if src.is_dir():
+        for p in sorted(src.rglob("*")):
+            if p.is_file() and p.suffix.lower() in SUFFIXES:
+                found.append((p.name, {"path": p}))
+    elif zipfile.is_zipfile(src):
+        with zipfile.ZipFile(src) as zf:
+            for info in zf.infolist():
+                name = PurePosixPath(info.filename)
+                if info.is_dir() or name.parts[0] == "__MACOSX" or name.suffix.lower() not in SUFFIXES:
+                    continue
+                found.append((name.name, {"data": zf.read(info)}))
+    else:
+        raise ValueError(f"디렉터리나 ZIP 파일이 아닙니다: {src}")
+
+    files, used = [], set()
+    for name, source in found:
+        stem, ext = os.path.splitext(name)
+        i = 1
+        while name in used:
+            name = f"{stem}_{i}{ext}"
+            i += 1
+        used.add(name)
+        files.append(LocalFile(name, **source))
+    return files
+
+
+# ============================
+# 💾 출력 트리 기록
+# ============================
+def write_outputs(out_dir, entries_by_folder, resume=False, log=print):
+    """folder_entries 결과를 out_dir 아래에 기록 → (기록 수, 건너뜀 수)
+
+    파일마다 임시 파일 → os.replace 로 교체하므로, 경로가 있으면 완성된 파일이다
+    (--resume 은 이미 있는 경로를 다시 쓰지 않는다).
+    """
+    written = skipped = 0
+    for main_group, entries in entries_by_folder:
+        for arcname, f in entries:
+            target = out_dir / arcname
+            if resume and target.exists():
+                skipped += 1
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(f.getvalue())
+            os.replace(tmp, target)
+            written += 1
+        log(f"{main_group} 처리 완료")
+    return written, skipped
+
+
+# ============================
+# 🚀 CLI
+# ============================
+def main():
+    p = argparse.ArgumentParser(description="AI DAZY document organizer (headless)")
+    p.add_argument("input", help="문서 디렉터리 또는 ZIP (.md / .pdf / .txt)")
+    p.add_argument("output", help="정리된 폴더 트리를 기록할 디렉터리")
+    p.add_argument("--cache", default=".cache-cli", help="캐시 디렉터리 (실행 중인 앱의 캐시와 겹치지 않게)")
+    p.add_argument("--shards", type=int, default=1, help="expand / 임베딩을 나눠 실행할 프로세스 수")
+    p.add_argument("--resume", action="store_true", help="비어 있지 않은 출력에 이어서 기록 (있는 파일은 건너뜀)")
+    p.add_argument("--full", action="store_true", help="기존 폴더 트리를 무시하고 전체 다시 분류")
+    p.add_argument("--api-key", default=os.getenv("OPENAI_API_KEY"), help="기본값: $OPENAI_API_KEY")
+    p.add_argument("--rpm", type=int, default=500)
+    p.add_argument("--tpm", type=int, default=200_000)
+    p.add_argument("--max-files", type=int, default=PipelineSettings.max_files_per_cluster)
+    p.add_argument("--embed-dtype", default="float32")
+    p.add_argument("--embed-dims", type=int, default=None)
+    p.add_argument("--reduce", choices=["pca", "random"], default=None)
+    p.add_argument("--reduce-dim", type=int, default=256)
+    args = p.parse_args()
+
+    if not args.api_key:
+        p.error("API Key 가 없습니다 (--api-key 또는 OPENAI_API_KEY)")
+
+    out_dir = Path(args.output)
+    if out_dir.exists() and any(out_dir.iterdir()) and not args.resume:
+        p.error(f"출력 디렉터리가 비어 있지 않습니다: {out_dir} (이어서 기록하려면 --resume)")
+
+    def log(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    started = time.monotonic()
+    try:
+        files = load_inputs(args.input)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        p.error(str(e))
+    if not files:
+        p.error(f"처리할 문서가 없습니다: {args.input}")
+    log(f"[문서 {len(files)}개 로드]")
+
+    caches = get_caches(
+        args.cache,
+        embed_dtype=args.embed_dtype,
+        embed_dims=args.embed_dims,
+        reduce=args.reduce,
+        reduce_dim=args.reduce_dim,
+    )
+    engine = LLMEngine(api_key=args.api_key, rpm=args.rpm, tpm=args.tpm)
+    pipeline = DocumentPipeline(
+        caches,
+        engine,
+        PipelineSettings(max_files_per_cluster=args.max_files, embed_dimensions=args.embed_dims),
+        log=log,
+        shards=args.shards,
+        org_model_path=Path(args.cache) / "organization.npz",
+    )
+
+    caches.refresh_vectors()
+    table = build_doc_table(files)
+    folders, readmes, mode = pipeline.organize(table, full_recluster=args.full)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written, skipped = write_outputs(out_dir, folder_entries(table, folders, readmes), args.resume, log)
+
+    # JournalCache 는 백그라운드 writer → 종료 전에 디스크 반영 확인
+    for c in (caches.group, caches.readme, caches.expand, caches.extracts, caches.runs):
+        c.flush()
+
+    print(json.dumps({
+        "input": str(args.input),
+        "output": str(out_dir),
+        "mode": mode,
+        "documents": len(files),
+        "unique_documents": len(table["files"]),
+        "folders": sum(1 + len(subs) for _, _, subs in folders),
+        "files_written": written,
+        "files_skipped": skipped,
+        "elapsed_s": round(time.monotonic() - started, 2),
+        "requests": engine.stats,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
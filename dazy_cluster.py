@@ -0,0 +1,164 @@
+# AI DAZY clustering helpers
+
+import numpy as np
+from hdbscan import HDBSCAN
+
+
+# ============================
+# 🌳 1회 fit 계층 분할 (condensed tree)
+# ============================
+class CondensedTreeSplitter:
+    """전체 코퍼스에 HDBSCAN 을 한 번만 fit 하고, 하위 폴더 분할은 condensed tree 에서 읽는다
+
+    - 전체 집합 → HDBSCAN flat 라벨(EOM) 그대로 (기존 1단계 결과와 동일)
+    - 부분 집합 → 집합 전체를 포함하는 가장 깊은 트리 노드(LCA)의 자식 클러스터별로 분할,
+      LCA 에서 바로 떨어져 나간 점은 -1 (noise 와 같은 취급)
+    """
+
+    def __init__(self, vectors, min_cluster_size=3, min_samples=1):
+        self.n = len(vectors)
+        self.clusterer = HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples).fit(vectors)
+        self.labels = self.clusterer.labels_
+
+        raw = self.clusterer.condensed_tree_._raw_tree
+        self._parent = {}
+        for parent, child in zip(raw["parent"].tolist(), raw["child"].tolist()):
+            self._parent[child] = parent
+        self._chains = {}
+
+    def _chain(self, node):
+        """root → node 가 떨어져 나간 클러스터 까지의 경로"""
+        path = []
+        p = self._parent.get(node)
+        while p is not None and p not in self._chains:
+            path.append(p)
+            p = self._parent.get(p)
+
+        chain = self._chains[p] if p is not None else ()
+        for q in reversed(path):
+            chain = chain + (q,)
+            self._chains[q] = chain
+        return chain
+
+    def labels_for(self, idx):
+        idx = np.asarray(idx)
+        if len(idx) == self.n:
+            return self.labels
+
+        chains = [self._chain(int(i)) for i in idx]
+        depth = 0
+        while all(len(c) > depth for c in chains) and len({c[depth] for c in chains}) == 1:
+            depth += 1
+
+        # LCA = chains[*][depth - 1], 그 아래 자식 클러스터가 새 라벨
+        ids = {}
+        labels = np.empty(len(idx), dtype=int)
+        for j, c in enumerate(chains):
+            if len(c) > depth:
+                labels[j] = ids.setdefault(c[depth], len(ids))
+            else:
+                labels[j] = -1
+        return labels
+
+
+# ============================
+# 🔌 클러스터링 백엔드
+# ============================
+class HDBSCANBackend:
+    """밀도 기반 (noise = -1). 크기 상한은 없음 → 큰 그룹은 recursive_cluster 가 다시 분해"""
+
+    name = "hdbscan"
+
+    def __init__(self, min_cluster_size=3, min_samples=1):
+        self.min_cluster_size = min_cluster_size
+        self.min_samples = min_samples
+
+    def fit_predict(self, X, max_size):
+        return HDBSCAN(min_cluster_size=self.min_cluster_size, min_samples=self.min_samples).fit_predict(X)
+
+
+class MiniBatchKMeansBackend:
+    """k = ceil(n / max_size) MiniBatchKMeans + 용량 제한 재배정 → 모든 그룹이 max_size 이하"""
+
+    name = "kmeans"
+
+    def __init__(self, batch_size=1024, seed=0):
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def fit_predict(self, X, max_size):
+        from sklearn.cluster import MiniBatchKMeans
+
+        k = max(1, -(-len(X) // max_size))
+        if k == 1:
+            return np.zeros(len(X), dtype=int)
+        km = MiniBatchKMeans(n_clusters=k, batch_size=self.batch_size, n_init=3, random_state=self.seed).fit(X)
+        return balance_labels(X, km.cluster_centers_, max_size)
+
+
+class AgglomerativeKNNBackend:
+    """sparse kNN 그래프 연결 제약 Ward 병합 (k = ceil(n / max_size))
+
+    크기 상한을 보장하지는 않으므로, 넘치는 그룹은 recursive_cluster 가 다시 분해한다.
+    """
+
+    name = "agglomerative"
+
+    def __init__(self, n_neighbors=10):
+        self.n_neighbors = n_neighbors
+
+    def fit_predict(self, X, max_size):
+        from sklearn.cluster import AgglomerativeClustering
+        from sklearn.neighbors import kneighbors_graph
+
+        k = max(1, -(-len(X) // max_size))
+        if k == 1 or len(X) <= self.n_neighbors:
+            return np.zeros(len(X), dtype=int)
+        graph = kneighbors_graph(X, n_neighbors=self.n_neighbors, include_self=False)
+        return AgglomerativeClustering(n_clusters=k, connectivity=graph, linkage="ward").fit_predict(X)
+
+
+def balance_labels(X, centers, max_size):
+    """가장 가까운 중심에 배정하되, 넘치는 클러스터는 먼 점부터 빈자리 있는 다음 중심으로 이동"""
+    X = np.asarray(X, dtype=np.float32)
+    centers = np.asarray(centers, dtype=np.float32)
+    dist = (X * X).sum(1)[:, None] - 2 * X @ centers.T + (centers * centers).sum(1)[None, :]
+    labels = np.argmin(dist, axis=1)
+    counts = np.bincount(labels, minlength=len(centers))
+
+    for c in np.where(counts > max_size)[0]:
+        members = np.where(labels == c)[0]
+        evicted = members[np.argsort(dist[members, c])[max_size:]]
+        counts[c] = max_size
+        for p in evicted:
+            row = np.where(counts >= max_size, np.inf, dist[p])
+            labels[p] = int(np.argmin(row))
+            counts[labels[p]] += 1
+    return labels
+
+
+CLUSTER_BACKENDS = {
+    "hdbscan": HDBSCANBackend,
+    "kmeans": MiniBatchKMeansBackend,
+    "agglomerative": AgglomerativeKNNBackend,
+}
+
+
+def select_backend(n, depth, max_size, hdbscan_max=3000, agglomerative_max=20000):
+    """코퍼스 크기 / 재분해 깊이로 백엔드 이름 선택
+
+    - 작은 집합            → hdbscan (noise 구분, 기존 결과 유지)
+    - 재분해(depth ≥ 1) 중 큰 집합 → kmeans (크기 상한 보장 → 더 이상 재귀 없음)
+    - 최상위 큰 집합       → kNN 그래프 agglomerative, 아주 크면 kmeans
+    """
+    if n <= hdbscan_max and (depth == 0 or n <= 4 * max_size):
+        return "hdbscan"
+    if depth >= 1 or n > agglomerative_max:
+        return "kmeans"
+    return "agglomerative"
+
+
+def make_backend(name, **hdbscan_params):
+    if name == "hdbscan":
+        return HDBSCANBackend(**hdbscan_params)
+    return CLUSTER_BACKENDS[name]()
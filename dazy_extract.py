@@ -0,0 +1,109 @@
+# AI DAZY content extraction
+
+import codecs
+import hashlib
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+
+
+# ============================
+# 📄 형식별 추출 (문자 예산까지만)
+# ============================
+def clean_text(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def extract_pdf(data, budget):
+    """PDF 를 페이지 단위로 읽다가 예산을 채우면 바로 중단"""
+    import fitz  # PyMuPDF
+
+    parts, size = [], 0
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for page in doc:
+            t = clean_text(page.get_text())
+            if not t:
+                continue
+            parts.append(t)
+            size += len(t) + 1
+            if size >= budget:
+                break
+    return " ".join(parts)[:budget]
+
+
+def extract_plain(data, budget, chunk_size=8192):
+    """MD / TXT 를 조각 단위로 점진 디코딩 (전체 파일을 한 번에 decode 하지 않음)"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    view = memoryview(data)
+    parts, size = [], 0
+    for i in range(0, len(view), chunk_size):
+        t = decoder.decode(view[i:i + chunk_size], final=i + chunk_size >= len(view))
+        parts.append(t)
+        size += len(t)
+        # 공백 정리로 줄어드는 만큼 여유를 두고 읽는다
+        if size >= 2 * budget:
+            break
+    return clean_text("".join(parts))[:budget]
+
+
+def extract_one(name, data, budget):
+    if PurePosixPath(name).suffix.lower() == ".pdf":
+        return extract_pdf(data, budget)
+    return extract_plain(data, budget)
+
+
+# ============================
+# ⚙️ 프로세스 풀 (프로세스당 1개)
+# ============================
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool(workers=None):
+    # 스레드가 도는 서버 프로세스(journal writer / 작업 스레드 / aiohttp) 를 fork 하면
+    # 교착될 수 있으므로 spawn 으로 시작
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_texts(items, budget=4000, cache=None, workers=None, hashes=None):
+    """[(파일명, bytes), ...] → [본문 앞부분 텍스트, ...]
+
+    - 결과는 content hash(+예산) 로 캐시 → 같은 내용은 다시 추출하지 않음
+      (호출 측에서 이미 계산한 hash 가 있으면 hashes 로 넘겨 재계산을 피한다)
+    - 추출에 실패한 파일은 "" 로 돌려주되 캐시하지 않는다
+    - PDF 가 2개 이상이면 프로세스 풀에서 병렬 추출, MD/TXT 는 현재 프로세스에서 처리
+    """
+    if hashes is None:
+        hashes = [content_hash(data) for _, data in items]
+    keys = [f"{ch}:{budget}" for ch in hashes]
+    results = [cache.get(k) if cache is not None else None for k in keys]
+
+    todo = [i for i, r in enumerate(results) if r is None]
+    pdfs = [i for i in todo if PurePosixPath(items[i][0]).suffix.lower() == ".pdf"]
+
+    futures = {}
+    if len(pdfs) >= 2:
+        pool = get_pool(workers)
+        futures = {i: pool.submit(extract_one, items[i][0], items[i][1], budget) for i in pdfs}
+
+    # 풀에서 도는 PDF 를 기다리는 동안 MD/TXT 먼저 처리
+    for i in sorted(todo, key=lambda i: i in futures):
+        try:
+            results[i] = futures[i].result() if i in futures else extract_one(items[i][0], items[i][1], budget)
+        except Exception:
+            results[i] = ""
+            continue
+        if cache is not None:
+            cache[keys[i]] = results[i]
+
+    return results
@@ -0,0 +1,206 @@
+# AI DAZY background job runner
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# ============================
+# 📋 작업 1건
+# ============================
+class Job:
+    """작업 상태 / 진행률 / 로그 — 워커 스레드가 기록하고 페이지는 읽기만 한다
+
+    status: "queued" → "running" → "done" / "failed" (대기 중 취소 시 "cancelled")
+    """
+
+    LOG_LIMIT = 500
+
+    def __init__(self, job_id, owner, key, title, result_path):
+        self.id = job_id
+        self.owner = owner
+        self.key = key
+        self.title = title
+        self.result_path = Path(result_path)   # 작업이 결과(ZIP) 를 기록할 경로
+        self.status = "queued"
+        self.done = 0
+        self.goal = 0
+        self.logs = []
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def log(self, msg):
+        with self._lock:
+            self.logs.append(msg)
+            del self.logs[:-self.LOG_LIMIT]
+
+    def progress(self, done, goal):
+        with self._lock:
+            self.done, self.goal = done, goal
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def percent(self):
+        if self.status == "done":
+            return 100
+        return int(self.done / self.goal * 100) if self.goal else 0
+
+    def tail(self, n=10):
+        with self._lock:
+            return self.logs[-n:]
+
+
+# ============================
+# ⚙️ 작업 풀 + 레지스트리 (프로세스당 1개)
+# ============================
+class JobRunner:
+    """세션 / rerun 과 무관하게 유지되는 작업 풀
+
+    - 워커는 서버 프로세스 안의 스레드: 캐시(JournalCache / EmbeddingStore) 가 프로세스 단위
+      단일 writer 라서 같은 프로세스에서 돌린다. CPU 작업(PDF 추출 / expand·임베딩 샤드) 은
+      기존 프로세스 풀이 맡는다
+    - 같은 owner + key 의 작업이 있으면 (취소 / 실패한 작업 제외) 새로 만들지 않고 그 작업을 돌려준다
+      (rerun 마다 같은 업로드가 다시 제출되지 않게)
+    - 끝난 작업은 keep_hours 가 지나면 결과 파일과 함께 정리
+    """
+
+    def __init__(self, workers=2, result_dir="job_results", keep_hours=24):
+        self.result_dir = Path(result_dir)
+        self.keep_hours = keep_hours
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dazy-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)   # run_exclusive 가 끝나면 깨운다
+        self._exclusive = None                           # run_exclusive 실행 중인 작업
+
+    def submit(self, fn, owner=None, key=None, title=""):
+        """fn(job) 을 대기열에 추가 → Job"""
+        with self._lock:
+            self._prune()
+            job = self._find(owner, key)
+            if job is not None:
+                return job
+
+            job_id = uuid.uuid4().hex[:12]
+            job = Job(job_id, owner, key, title, self.result_dir / f"{job_id}.zip")
+            self._jobs[job_id] = job
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        with self._idle:
+            # 다른 작업의 run_exclusive 가 끝날 때까지 대기 (대기 중에도 레지스트리 잠금은 풀려 있다)
+            while self._exclusive is not None:
+                self._idle.wait()
+            if job.status == "cancelled":
+                return
+            job.status = "running"
+            job.started = time.time()
+        # finished 를 먼저 기록한 뒤 상태를 바꾼다 → 끝난 작업(active=False) 은 항상 finished 가 있다
+        try:
+            self.result_dir.mkdir(parents=True, exist_ok=True)
+            fn(job)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.log(f"❌ 실패: {job.error}")
+            job.finished = time.time()
+            job.status = "failed"
+        else:
+            job.finished = time.time()
+            job.status = "done"
+
+    def run_exclusive(self, job, fn):
+        """다른 작업이 실행 중이 아닐 때만 fn() 실행 → 실행했으면 True
+
+        fn() 동안 대기 중인 작업은 실행 상태로 넘어가지 않는다 (_run 에서 대기)
+        레지스트리 잠금은 쥐지 않으므로 제출 / 조회 / 폴링은 막히지 않는다
+        (공유 상태 교체용: 실행 중인 작업이 쓰는 벡터 공간 등)
+        """
+        with self._lock:
+            if self._exclusive is not None or any(j is not job and j.status == "running" for j in self._jobs.values()):
+                return False
+            self._exclusive = job
+        try:
+            fn()
+            return True
+        finally:
+            with self._idle:
+                self._exclusive = None
+                self._idle.notify_all()
+
+    # ----------------------------
+    # 조회 / 정리
+    # ----------------------------
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def find(self, owner, key):
+        with self._lock:
+            return self._find(owner, key)
+
+    def _find(self, owner, key):
+        if key is None:
+            return None
+        for job in self._jobs.values():
+            if job.owner == owner and job.key == key and job.status not in ("cancelled", "failed"):
+                return job
+        return None
+
+    def queued_before(self, job):
+        """job 보다 먼저 대기열에 들어간 대기 / 실행 중 작업 수 (모든 세션 합계)"""
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.active and j.created < job.created)
+
+    def jobs(self, owner=None):
+        """최근 작업부터"""
+        with self._lock:
+            found = [j for j in self._jobs.values() if owner is None or j.owner == owner]
+        return sorted(found, key=lambda j: j.created, reverse=True)
+
+    def cancel(self, job_id):
+        """대기 중인 작업만 취소 (실행 중인 작업은 끝까지 간다)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished = time.time()
+            return True
+
+    def remove(self, job_id):
+        """끝난 작업과 결과 파일 삭제"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.active:
+                return False
+            del self._jobs[job_id]
+        job.result_path.unlink(missing_ok=True)
+        return True
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_hours * 3600
+        for job_id, job in list(self._jobs.items()):
+            if not job.active and job.finished < cutoff:
+                del self._jobs[job_id]
+                job.result_path.unlink(missing_ok=True)
+
+
+_RUNNERS = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def get_runner(result_dir="job_results", workers=2, keep_hours=24):
+    """결과 디렉터리당 하나의 JobRunner (import 된 모듈에 보관 → rerun / 세션 간 공유)"""
+    key = str(Path(result_dir).resolve())
+    with _RUNNERS_LOCK:
+        if key not in _RUNNERS:
+            _RUNNERS[key] = JobRunner(workers=workers, result_dir=result_dir, keep_hours=keep_hours)
+        return _RUNNERS[key]
@@ -0,0 +1,366 @@
+# AI DAZY LLM request engine
+
+import asyncio
+import hashlib
+import random
+import threading
+import time
+
+import aiohttp
+import openai
+
+
+# ============================
+# 🔁 재시도 대상 오류
+# ============================
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+)
+
+
+_ENCODING = None
+_ENCODING_LOCK = threading.Lock()
+
+
+def _encoding():
+    """tiktoken 이 설치돼 있으면 cl100k_base 인코더 (없거나 로드 실패 시 False)"""
+    global _ENCODING
+    with _ENCODING_LOCK:
+        if _ENCODING is None:
+            try:
+                import tiktoken
+
+                _ENCODING = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _ENCODING = False
+        return _ENCODING
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 — tiktoken 이 있으면 실제 인코딩, 없으면 문자 종류별 보수적 추정
+
+    ASCII 는 4자/토큰, 한글 등 나머지 문자는 1자/토큰 이상으로 센다
+    (한글 ≈ 1~2자/토큰 이므로 1자/토큰 이 안전한 쪽)
+    """
+    text = text or ""
+    enc = _encoding()
+    if enc:
+        return len(enc.encode(text, disallowed_special=())) + 1
+    n_ascii = len(text.encode("ascii", "ignore"))
+    return n_ascii // 4 + (len(text) - n_ascii) + 1
+
+
+def estimate_chat_tokens(messages, max_tokens=None) -> int:
+    prompt = sum(estimate_tokens(m.get("content", "")) + 4 for m in messages)
+    return prompt + (max_tokens or 512)
+
+
+# ============================
+# 🧩 임베딩 배치 한도
+# ============================
+EMBED_MAX_INPUTS = 2048      # 요청당 입력 개수 한도
+EMBED_MAX_TOKENS = 250_000   # 요청당 토큰 한도(300k) 에 여유를 둔 값
+
+
+def pack_batches(texts, max_inputs=EMBED_MAX_INPUTS, max_tokens=EMBED_MAX_TOKENS):
+    """입력 순서대로 토큰 추정치 / 개수 한도까지 채운 배치(인덱스 목록) 목록"""
+    batches, cur, size = [], [], 0
+    for i, t in enumerate(texts):
+        n = estimate_tokens(t)
+        if cur and (len(cur) >= max_inputs or size + n > max_tokens):
+            batches.append(cur)
+            cur, size = [], 0
+        cur.append(i)
+        size += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+# ============================
+# 🪣 RPM / TPM 토큰 버킷
+# ============================
+class RateBudget:
+    """분당 요청 수(RPM) + 분당 토큰 수(TPM) 를 함께 관리하는 토큰 버킷"""
+
+    def __init__(self, rpm, tpm):
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self._req = self.rpm
+        self._tok = self.tpm
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        dt = now - self._updated
+        self._updated = now
+        self._req = min(self.rpm, self._req + dt * self.rpm / 60)
+        self._tok = min(self.tpm, self._tok + dt * self.tpm / 60)
+
+    def reserve(self, tokens):
+        """예산이 있으면 차감 후 0, 없으면 기다려야 할 초 반환"""
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            self._refill()
+            if self._req >= 1 and self._tok >= tokens:
+                self._req -= 1
+                self._tok -= tokens
+                return 0.0
+            wait_req = max(0.0, (1 - self._req) * 60 / self.rpm)
+            wait_tok = max(0.0, (tokens - self._tok) * 60 / self.tpm)
+            return max(wait_req, wait_tok)
+
+    def settle(self, estimated, actual):
+        """응답의 실제 usage 로 추정치 보정"""
+        with self._lock:
+            self._tok -= actual - estimated
+
+    def penalize(self):
+        """429 수신 → 버킷 비우기"""
+        with self._lock:
+            self._req = min(self._req, 0.0)
+            self._tok = min(self._tok, 0.0)
+
+
+# ============================
+# ⚡ 비동기 요청 엔진
+# ============================
+class LLMEngine:
+    """RPM/TPM 예산 + jitter 백오프 재시도 + AIMD 적응형 동시성을 갖춘 OpenAI 호출기
+
+    - 성공 시 동시성을 조금씩 늘리고(+1/동시성), 429 를 받으면 절반으로 줄인다
+    - 재시도 불가 오류(InvalidRequest, Authentication 등)는 즉시 raise
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        rpm=500,
+        tpm=200_000,
+        min_concurrency=1,
+        max_concurrency=32,
+        start_concurrency=4,
+        max_retries=6,
+        base_delay=1.0,
+        max_delay=30.0,
+    ):
+        self.api_key = api_key
+        self.budget = RateBudget(rpm, tpm)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(start_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "splits": 0}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    # ----------------------------
+    # 동시성 슬롯 (AIMD)
+    # ----------------------------
+    async def _acquire(self):
+        while True:
+            with self._lock:
+                if self._in_flight < int(self.concurrency):
+                    self._in_flight += 1
+                    return
+            await asyncio.sleep(0.05)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _on_success(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def _on_throttle(self):
+        with self._lock:
+            self.stats["throttled"] += 1
+            self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+        self.budget.penalize()
+
+    # ----------------------------
+    # 공통 호출 루프
+    # ----------------------------
+    async def _call(self, fn, estimated, kwargs):
+        if self.api_key:
+            kwargs.setdefault("api_key", self.api_key)
+
+        for attempt in range(self.max_retries + 1):
+            while True:
+                wait = self.budget.reserve(estimated)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            await self._acquire()
+            try:
+                r = await fn(**kwargs)
+                self._on_success()
+                usage = r.get("usage") or {}
+                if usage.get("total_tokens"):
+                    self.budget.settle(estimated, usage["total_tokens"])
+                return r
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.error.RateLimitError):
+                    self._on_throttle()
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.stats["failed"] += 1
+                    raise
+            finally:
+                self._release()
+
+            with self._lock:
+                self.stats["retries"] += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def chat(self, **kwargs):
+        estimated = estimate_chat_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        return await self._call(openai.ChatCompletion.acreate, estimated, kwargs)
+
+    async def embed(self, **kwargs):
+        inputs = kwargs.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        estimated = sum(estimate_tokens(t) for t in inputs)
+        return await self._call(openai.Embedding.acreate, estimated, kwargs)
+
+    async def embed_many(self, texts, on_batch=None, max_inputs=EMBED_MAX_INPUTS, max_tokens=EMBED_MAX_TOKENS, **kwargs):
+        """texts → 임베딩 벡터 목록 (입력 순서 유지)
+
+        - 토큰 추정치 / 입력 개수 한도까지 채운 배치를 동시에 요청
+        - 크기 / 입력 검증 오류(InvalidRequestError) 로 거절된 배치만 반으로 나눠 다시 요청,
+          1개짜리가 거절되면 raise. 재시도를 다 쓴 429 / 연결 오류, 인증 오류는 나누지 않고 바로 raise
+        - on_batch(인덱스 목록, 벡터 목록) 로 끝난 배치를 바로 넘겨받을 수 있다 (캐시 저장용)
+        """
+        texts = list(texts)
+        out = [None] * len(texts)
+
+        async def _run(idx):
+            try:
+                r = await self.embed(input=[texts[i] for i in idx], **kwargs)
+            except openai.error.InvalidRequestError:
+                if len(idx) == 1:
+                    raise
+                with self._lock:
+                    self.stats["splits"] += 1
+                mid = len(idx) // 2
+                await asyncio.gather(_run(idx[:mid]), _run(idx[mid:]))
+                return
+
+            vectors = [None] * len(idx)
+            for j, d in enumerate(r["data"]):
+                vectors[d.get("index", j)] = d["embedding"]
+            for i, v in zip(idx, vectors):
+                out[i] = v
+            if on_batch is not None:
+                on_batch(idx, vectors)
+
+        await asyncio.gather(*(_run(b) for b in pack_batches(texts, max_inputs, max_tokens)))
+        return out
+
+    # ----------------------------
+    # 동기 코드(Streamlit 스크립트)용 브리지
+    # ----------------------------
+    def run(self, coro):
+        """코루틴을 공용 aiohttp 세션 위에서 끝까지 실행하고 결과 반환"""
+
+        async def _with_session():
+            async with aiohttp.ClientSession() as session:
+                token = openai.aiosession.set(session)
+                try:
+                    return await coro
+                finally:
+                    openai.aiosession.reset(token)
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_with_session())
+
+        # 이미 이벤트 루프 안이면 별도 스레드에서 실행
+        box = {}
+
+        def _target():
+            try:
+                box["result"] = asyncio.run(_with_session())
+            except BaseException as e:
+                box["error"] = e
+
+        t = threading.Thread(target=_target)
+        t.start()
+        t.join()
+        if "error" in box:
+            raise box["error"]
+        return box["result"]
+
+    def chat_sync(self, **kwargs):
+        return self.run(self.chat(**kwargs))
+
+
+# ============================
+# 📶 순서 유지 + 진행률 gather
+# ============================
+async def gather_with_progress(coros, on_done=None):
+    """결과는 입력 순서대로 모으고, 하나 끝날 때마다 on_done(완료 수, 전체 수) 호출"""
+    coros = list(coros)
+    total = len(coros)
+    finished = 0
+
+    async def _track(coro):
+        nonlocal finished
+        result = await coro
+        finished += 1
+        if on_done is not None:
+            on_done(finished, total)
+        return result
+
+    return await asyncio.gather(*(_track(c) for c in coros))
+
+
+# ============================
+# 🪜 계층 요약 (map-reduce)
+# ============================
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def map_reduce_texts(items, chunk_size, summarize):
+    """항목이 chunk_size 개 이하가 될 때까지 chunk 단위 요약을 병렬로 반복
+
+    summarize(chunk, level) → 요약 문자열. 요청 1건의 입력은 chunk_size 개로,
+    단계 수는 log_{chunk_size}(n) 으로 제한되므로 폴더 크기와 무관하게 지연 / 토큰이 묶인다.
+    """
+    items = list(items)
+    level = 0
+    while len(items) > chunk_size:
+        items = await asyncio.gather(*(summarize(c, level) for c in chunked(items, chunk_size)))
+        level += 1
+    return items
+
+
+# ============================
+# 🗄️ API Key 별 공용 엔진
+# ============================
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(api_key, **settings):
+    """API Key 당 하나의 LLMEngine (예산 / 동시성 상태가 rerun·세션 간 유지)"""
+    key = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    with _ENGINES_LOCK:
+        if key not in _ENGINES:
+            _ENGINES[key] = LLMEngine(api_key=api_key, **settings)
+        return _ENGINES[key]
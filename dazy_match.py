@@ -0,0 +1,165 @@
+# AI DAZY document → topic matching
+
+import json
+
+import numpy as np
+
+
+# ============================
+# 📐 정규화
+# ============================
+def normalize_rows(X):
+    """float32 로 변환 후 행 단위 L2 정규화 (내적 = cosine 유사도)"""
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+# ============================
+# 🎯 블록 단위 top-k 매칭
+# ============================
+def topk_match(docs, topics, k=1, block_bytes=32 * 1024 * 1024):
+    """문서별 cosine 유사도 상위 k 개 주제 → (주제 번호 (n, k), 점수 (n, k))
+
+    - 유사도 행렬 전체를 만들지 않고 행 블록 단위로 곱한다
+      (블록 크기는 block_bytes / (4 * 주제 수) 행 → 문서 수와 무관하게 메모리 고정)
+    - 점수는 내림차순 정렬
+    """
+    topics_n = normalize_rows(topics)
+    n, m = len(docs), len(topics_n)
+    k = max(1, min(k, m))
+
+    best = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    block = max(1, block_bytes // (4 * max(m, 1)))
+
+    for start in range(0, n, block):
+        sim = normalize_rows(docs[start:start + block]) @ topics_n.T
+        rows = np.arange(len(sim))[:, None]
+        if k == 1:
+            top = np.argmax(sim, axis=1)[:, None]
+        else:
+            top = np.argpartition(sim, m - k, axis=1)[:, m - k:]
+            top = np.take_along_axis(top, np.argsort(-sim[rows, top], axis=1), axis=1)
+        best[start:start + len(sim)] = top
+        scores[start:start + len(sim)] = sim[rows, top]
+
+    return best, scores
+
+
+def group_by_topic(best, n_topics):
+    """문서별 1순위 주제 번호 → 주제별 문서 번호 배열 목록 (입력 순서 유지)"""
+    best = np.asarray(best)
+    order = np.argsort(best, kind="stable")
+    counts = np.bincount(best, minlength=n_topics)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+# ============================
+# 🧭 2단계 라우팅 매칭 (카테고리 중심 → 하위 주제)
+# ============================
+def category_centroids(topics, groups, n_groups):
+    """카테고리별 하위 주제 벡터 평균 → 정규화한 중심 (n_groups, dim)"""
+    topics_n = normalize_rows(topics)
+    sums = np.zeros((n_groups, topics_n.shape[1]), dtype=np.float32)
+    np.add.at(sums, groups, topics_n)
+    return normalize_rows(sums)
+
+
+def routed_match(docs, topics, groups, route_k=3, margin=0.02, block_bytes=32 * 1024 * 1024, centroids=None):
+    """문서 → 카테고리 중심 상위 route_k 개 → 그 카테고리들의 하위 주제와만 비교
+
+    groups[t] 는 주제 t 의 카테고리 번호. 반환: (1순위 주제 (n,), 점수 (n,), 전수 비교 여부 (n,))
+
+    - 1순위 카테고리와 처음 제외된 카테고리의 중심 점수 차가 margin 보다 작으면
+      라우팅을 믿지 않고 전체 주제와 비교 (margin=None 이면 폴백 없음)
+    - 카테고리 수가 route_k 이하이면 그냥 전수 비교
+    - centroids 를 주면 (TaxonomyIndex 에 저장된 값) 중심 계산을 건너뛴다
+    """
+    groups = np.asarray(groups)
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+    n = len(docs)
+
+    if n_groups <= route_k:
+        best, scores = topk_match(docs, topics, k=1, block_bytes=block_bytes)
+        return best[:, 0], scores[:, 0], np.ones(n, dtype=bool)
+
+    if centroids is None:
+        centroids = category_centroids(topics, groups, n_groups)
+    routes, route_scores = topk_match(docs, centroids, k=route_k + 1, block_bytes=block_bytes)
+    if margin is None:
+        fallback = np.zeros(n, dtype=bool)
+    else:
+        fallback = route_scores[:, 0] - route_scores[:, route_k] < margin
+    routes = routes[:, :route_k]
+
+    best = np.full(n, -1, dtype=np.int32)
+    scores = np.full(n, -np.inf, dtype=np.float32)
+
+    # 카테고리마다 그쪽으로 라우팅된 문서만 모아서 그 카테고리의 하위 주제와 비교
+    members_by_group = group_by_topic(routes.ravel(), n_groups)
+    topics_by_group = group_by_topic(groups, n_groups)
+    for g in range(n_groups):
+        rows = members_by_group[g] // route_k
+        rows = rows[~fallback[rows]]
+        if len(rows) == 0 or len(topics_by_group[g]) == 0:
+            continue
+        local, s = topk_match(docs[rows], topics[topics_by_group[g]], k=1, block_bytes=block_bytes)
+        better = s[:, 0] > scores[rows]
+        best[rows[better]] = topics_by_group[g][local[better, 0]]
+        scores[rows[better]] = s[better, 0]
+
+    if fallback.any():
+        rows = np.flatnonzero(fallback)
+        b, s = topk_match(docs[rows], topics, k=1, block_bytes=block_bytes)
+        best[rows] = b[:, 0]
+        scores[rows] = s[:, 0]
+
+    return best, scores, fallback
+
+
+# ============================
+# 🗂️ 카테고리 인덱스 (README 단위로 저장)
+# ============================
+class TaxonomyIndex:
+    """파싱된 카테고리 트리 + 평탄화한 (카테고리, 하위 주제) 목록 + 정규화된 주제 행렬
+
+    README 내용 hash 로 저장해 두면 같은 카테고리 README 는 LLM 파싱 / 주제 임베딩 /
+    행렬 재구성 없이 바로 매칭에 쓸 수 있다. space 는 행렬이 속한 벡터 공간
+    (임베딩 차원 / 축소 모델) 으로, 다르면 트리만 재사용하고 행렬은 다시 만든다.
+    """
+
+    def __init__(self, structure, topics, matrix, space):
+        self.structure = structure
+        self.topics = [tuple(t) for t in topics]
+        self.matrix = normalize_rows(matrix)
+        self.space = space
+
+        category_ids = {}
+        self.groups = np.array(
+            [category_ids.setdefault(cat, len(category_ids)) for cat, _ in self.topics], dtype=np.int32,
+        )
+        self.centroids = category_centroids(self.matrix, self.groups, len(category_ids))
+
+    @staticmethod
+    def flatten(structure):
+        """카테고리 트리 → [(카테고리, 하위 주제), ...]"""
+        return [(c["category"], sub) for c in structure for sub in c.get("subtopics", [])]
+
+    def topic_texts(self):
+        return [f"{cat} - {sub}" for cat, sub in self.topics]
+
+    def save(self, p):
+        with open(p, "wb") as fp:
+            np.savez(
+                fp,
+                structure=json.dumps(self.structure, ensure_ascii=False),
+                topics=json.dumps(self.topics, ensure_ascii=False),
+                matrix=self.matrix,
+                space=self.space,
+            )
+
+    @classmethod
+    def load(cls, p):
+        z = np.load(p)
+        return cls(json.loads(str(z["structure"])), json.loads(str(z["topics"])), z["matrix"], str(z["space"]))
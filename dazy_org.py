@@ -0,0 +1,113 @@
+# AI DAZY persistent organization model
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from dazy_match import normalize_rows, topk_match
+
+
+# ============================
+# 🌳 폴더 트리 모델
+# ============================
+class OrgModel:
+    """지난 실행들이 만든 폴더 트리 (잎 = 메인/서브 폴더)
+
+    잎마다 구성원 {content hash: [파일명, 임베딩 키]} 와 구성원 벡터 합을 보관한다.
+    - 새 문서는 중심(합을 정규화) 과의 cosine 으로 한 번에 배정
+    - 벡터 합만 더하면 되므로 배정 시 기존 구성원 벡터를 다시 읽지 않는다
+    - space 는 벡터 공간 (임베딩 차원 / 축소 모델), 바뀌면 rebuild_sums 로 합을 다시 계산
+    """
+
+    def __init__(self, space, leaves, sums):
+        self.space = space
+        self.leaves = leaves   # [{"main": ..., "sub": ..., "members": {hash: [name, vec_key]}}, ...]
+        self.sums = np.asarray(sums, dtype=np.float32).reshape(len(leaves), -1)
+        self._reindex()
+
+    def _reindex(self):
+        self.member_of = {ch: i for i, leaf in enumerate(self.leaves) for ch in leaf["members"]}
+
+    def __len__(self):
+        return len(self.member_of)
+
+    @property
+    def fingerprint(self):
+        """폴더 / 구성원 구조의 지문 (파일 바이트가 아닌 내용 기준 → 다시 저장해도 같음)"""
+        return hashlib.sha256(json.dumps(self.leaves, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @property
+    def centroids(self):
+        return normalize_rows(self.sums)
+
+    # ----------------------------
+    # 생성 / 배정 / 재분해
+    # ----------------------------
+    @classmethod
+    def build(cls, space, folders, dim):
+        """folders: [(메인, 서브, {hash: [name, vec_key]}, 벡터 행렬), ...]"""
+        leaves, sums = [], []
+        for main, sub, members, vectors in folders:
+            leaves.append({"main": main, "sub": sub, "members": dict(members)})
+            sums.append(np.asarray(vectors, dtype=np.float32).reshape(-1, dim).sum(axis=0))
+        return cls(space, leaves, np.stack(sums) if sums else np.zeros((0, dim), dtype=np.float32))
+
+    def assign(self, vectors):
+        """새 문서 벡터 (n, dim) → 가장 가까운 잎 번호 (n,)"""
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.int32)
+        best, _ = topk_match(vectors, self.centroids, k=1)
+        return best[:, 0]
+
+    def add(self, leaf, content_hash, name, vec_key, vector):
+        self.leaves[leaf]["members"][content_hash] = [name, vec_key]
+        self.sums[leaf] += np.asarray(vector, dtype=np.float32)
+        self.member_of[content_hash] = leaf
+
+    def replace_leaf(self, leaf, parts):
+        """잎 하나를 [(서브 이름, {hash: [name, vec_key]}, 벡터 행렬), ...] 로 교체 → 새 잎 번호 목록"""
+        main = self.leaves[leaf]["main"]
+        new = [{"main": main, "sub": sub, "members": dict(members)} for sub, members, _ in parts]
+        new_sums = [np.asarray(v, dtype=np.float32).sum(axis=0) for _, _, v in parts]
+
+        self.leaves[leaf:leaf + 1] = new
+        self.sums = np.concatenate([self.sums[:leaf], np.stack(new_sums), self.sums[leaf + 1:]])
+        self._reindex()
+        return list(range(leaf, leaf + len(new)))
+
+    def rebuild_sums(self, store, space):
+        """벡터 공간이 바뀌었을 때 구성원 임베딩 키로 합 재계산 (store.take 는 (n, dim) 반환)"""
+        sums = []
+        for leaf in self.leaves:
+            keys = [vec_key for _, vec_key in leaf["members"].values()]
+            sums.append(store.take(keys).sum(axis=0))
+        self.sums = np.stack(sums).astype(np.float32)
+        self.space = space
+
+    def leaves_of(self, main):
+        return [i for i, leaf in enumerate(self.leaves) if leaf["main"] == main]
+
+    # ----------------------------
+    # 저장
+    # ----------------------------
+    def save(self, p):
+        p = Path(p)
+        tmp = p.with_name(p.name + ".tmp")
+        with open(tmp, "wb") as fp:
+            np.savez(
+                fp,
+                space=self.space,
+                leaves=json.dumps(self.leaves, ensure_ascii=False),
+                sums=self.sums,
+            )
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, p)
+
+    @classmethod
+    def load(cls, p):
+        z = np.load(p)
+        return cls(str(z["space"]), json.loads(str(z["leaves"])), z["sums"])
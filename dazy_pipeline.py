@@ -0,0 +1,1163 @@
+# AI DAZY document pipeline (Streamlit 앱 / CLI 공용)
+
+import asyncio
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from dazy_checkpoint import RunCheckpoint
+from dazy_cluster import CondensedTreeSplitter, make_backend, select_backend
+from dazy_extract import content_hash, extract_texts
+from dazy_llm import LLMEngine, gather_with_progress, map_reduce_texts
+from dazy_org import OrgModel
+
+
+# ============================
+# 🔧 파이프라인 설정
+# ============================
+class PipelineSettings:
+    """앱 상단 설정 상수와 같은 항목 (소문자). 키워드 인자로 일부만 덮어쓴다"""
+
+    max_files_per_cluster = 25
+    max_recursion_depth = 2
+    hdbscan_min_cluster_size = 3
+    hdbscan_min_samples = 1
+    cluster_single_fit = False
+    cluster_backend = "auto"
+    organize_incremental = True
+    expand_model = "gpt-5-nano"
+    embed_model = "text-embedding-3-large"
+    folder_model = "gpt-4o-mini"
+    embed_dimensions = None
+    expand_batch_size = 20
+    expand_batch_retries = 1
+    extract_char_budget = 4000
+    expand_excerpt_chars = 600
+    folder_combined_call = True
+    readme_chunk_size = 40
+
+    def __init__(self, **overrides):
+        for k, v in overrides.items():
+            if not hasattr(type(self), k):
+                raise TypeError(f"unknown pipeline setting: {k}")
+            setattr(self, k, v)
+
+
+AUTO_SPLIT_NOTICE = "> 문서 수가 많아 자동으로 나눈 폴더입니다.\n\n"
+
+# 끝나지 않은 실행 체크포인트 보관 기간
+CHECKPOINT_KEEP_DAYS = 7
+
+# 샤드 1개가 맡는 최소 항목 수 (이보다 적으면 프로세스를 띄우지 않음)
+SHARD_MIN_ITEMS = 50
+
+
+# ============================
+# ✨ 유틸
+# ============================
+def h(t: str):
+    return hashlib.sha256(t.encode("utf-8")).hexdigest()
+
+
+def sanitize_folder_name(name: str) -> str:
+    name = (name or "").strip()
+    name = re.sub(r"[^\w가-힣\s]", "", name)
+    name = re.sub(r"\s+", "_", name)
+    return name.strip("_") or "기타_문서"
+
+
+def unique_folder_name(base: str, existing: set) -> str:
+    if base not in existing:
+        return base
+    i = 1
+    while f"{base}_{i}" in existing:
+        i += 1
+    return f"{base}_{i}"
+
+
+def title_from_filename(file_name: str) -> str:
+    base = file_name.rsplit(".", 1)[0]
+    base = re.sub(r"[_\-]+", " ", base)
+    base = re.sub(r"\s+", " ", base).strip()
+    return base
+
+
+class LocalFile:
+    """업로드 파일과 같은 인터페이스 (.name / .getvalue()) — 경로만 주면 읽을 때마다 디스크에서"""
+
+    def __init__(self, name, data=None, path=None):
+        self.name = name
+        self._data = data
+        self.path = path
+
+    def getvalue(self):
+        if self._data is not None:
+            return self._data
+        return Path(self.path).read_bytes()
+
+
+def progress_callback(on_progress, offset=0, total=None):
+    """gather_with_progress 의 on_done(n, count) → on_progress(완료 수, 전체 수)"""
+    if on_progress is None:
+        return None
+
+    def on_done(n, count):
+        on_progress(offset + n, total or count)   # total 이 None 이면 이번 gather 의 요청 수 기준
+    return on_done
+
+
+_ORG_LOCKS = {}
+_ORG_LOCKS_LOCK = threading.Lock()
+
+
+def org_lock(path):
+    """폴더 트리 파일별 잠금 (한 프로세스의 여러 작업이 트리를 동시에 읽고 고쳐 쓰지 않게)"""
+    key = str(Path(path).resolve())
+    with _ORG_LOCKS_LOCK:
+        return _ORG_LOCKS.setdefault(key, threading.Lock())
+
+
+# ============================
+# 📋 실행 단위 문서 테이블
+# ============================
+def build_doc_table(files):
+    """한 번의 실행 동안 공유하는 문서 테이블 (expand 결과 + 공용 벡터 행렬)
+
+    내용이 같은 업로드는 content hash 로 한 행에 합친다 → expand / 임베딩 / 클러스터링은
+    행(고유 내용) 단위로 1회, 폴더에 기록할 때 copies 로 다시 펼친다.
+    """
+    rows = {}
+    for f in files:
+        rows.setdefault(content_hash(f.getvalue()), []).append(f)
+    return {
+        "hashes": list(rows),
+        "files": [copies[0] for copies in rows.values()],
+        "copies": list(rows.values()),
+        "texts": None,
+        "expanded": None,
+        "vectors": None,
+        "tree": None,
+        "checkpoint": None,   # RunCheckpoint (organize 가 설정)
+    }
+
+
+def files_at(table, idx):
+    return [table["files"][i] for i in idx]
+
+
+def keys_at(table, idx):
+    return [table["hashes"][i] for i in idx]
+
+
+def copies_at(table, idx):
+    # 중복 업로드까지 펼친 실제 파일 목록 (ZIP 기록용)
+    return [f for i in idx for f in table["copies"][i]]
+
+
+def distinct_groups(table, groups):
+    """같은 문서 집합의 그룹은 한 번만 요청 (서브 폴더 1개 = 메인 폴더 같은 경우)
+
+    반환: (요청할 그룹 목록, 그룹마다 그 목록의 위치)
+    """
+    first, slots = {}, []
+    for idx in groups:
+        slots.append(first.setdefault(tuple(sorted(keys_at(table, idx))), len(first)))
+    unique = [None] * len(first)
+    for idx, slot in zip(groups, slots):
+        if unique[slot] is None:
+            unique[slot] = idx
+    return unique, slots
+
+
+def vec_keys_at(table, idx):
+    # embed_texts 와 같은 키 (embedding_text hash)
+    return [h(table["expanded"][i]["embedding_text"]) for i in idx]
+
+
+# ============================
+# 📝 응답 파싱 / 캐시 키
+# ============================
+def expand_fallback(file_name):
+    fallback_title = title_from_filename(file_name)
+    return {
+        "canonical_title": fallback_title,
+        "keywords": fallback_title.split(),
+        "domain": "기타",
+        "embedding_text": f"제목: {fallback_title}",
+    }
+
+
+def parse_expand_batch(content):
+    """배치 응답 → {index: data} (항목별로 따로 검증, 깨진 항목은 제외)"""
+    content = re.sub(r"^```(?:json)?|```$", "", (content or "").strip()).strip()
+    try:
+        items = json.loads(content)
+    except Exception:
+        return {}
+    if isinstance(items, dict):
+        items = items.get("items", [])
+    if not isinstance(items, list):
+        return {}
+
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        idx = item.pop("index", None)
+        if not isinstance(idx, int) or not isinstance(item.get("embedding_text"), str):
+            continue
+        if item["embedding_text"].strip():
+            parsed[idx] = item
+    return parsed
+
+
+def parse_folder_response(content):
+    """{folder_name, readme} 응답 검증 → (폴더명, README) 또는 None"""
+    content = re.sub(r"^```(?:json)?|```$", "", (content or "").strip()).strip()
+    try:
+        data = json.loads(content)
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    name, readme = data.get("folder_name"), data.get("readme")
+    if not isinstance(name, str) or not isinstance(readme, str) or not readme.strip():
+        return None
+    return sanitize_folder_name(name), readme.strip()
+
+
+def group_name_key(names, keys=None):
+    return h("||".join(sorted(keys or names)))
+
+
+def readme_key(topic, files, auto_split=False, keys=None):
+    return h(("split" if auto_split else "nosplit") + topic + "||" + "||".join(sorted(keys or files)))
+
+
+# ============================
+# 🧾 실행 결과 메모이제이션
+# ============================
+def pack_run(table, folders, readmes):
+    # 행 번호 대신 content hash 로 저장 → 파일명 / 업로드 순서가 달라도 복원 가능
+    return {
+        "folders": [
+            [main_group, [[sub_group, keys_at(table, sub_idx)] for sub_group, sub_idx in sub_folders]]
+            for main_group, _, sub_folders in folders
+        ],
+        "readmes": list(readmes),
+    }
+
+
+def unpack_run(table, run):
+    row_of = {ch: i for i, ch in enumerate(table["hashes"])}
+    folders = [
+        (main_group, None, [(sub_group, np.array([row_of[ch] for ch in keys], dtype=int)) for sub_group, keys in subs])
+        for main_group, subs in run["folders"]
+    ]
+    return folders, run["readmes"]
+
+
+# ============================
+# 🗂️ 문서 정리 파이프라인
+# ============================
+class DocumentPipeline:
+    """본문 추출 → expand → 임베딩 → 재귀 클러스터링 → 폴더명 / README
+
+    Streamlit 앱과 CLI 가 같은 단계를 쓴다. 캐시는 CacheSet (get_caches) 그대로,
+    log(msg) 는 화면 / 표준 오류 등 호출 측 출력으로 연결한다.
+    shards > 1 이면 expand / 임베딩의 캐시 miss 를 여러 프로세스로 나눠 요청한다.
+    """
+
+    def __init__(self, caches, engine, settings=None, log=None, shards=1, org_model_path=None, checkpoint_dir=None):
+        self.caches = caches
+        self.engine = engine
+        self.settings = settings or PipelineSettings()
+        self.log = log or (lambda msg: None)
+        self.shards = max(1, int(shards))
+        self.org_model_path = Path(org_model_path or Path(".cache") / "organization.npz")
+        self.checkpoint_dir = checkpoint_dir   # 없으면 캐시 디렉터리 아래 checkpoints/
+
+        self.embedding_cache = caches.embeddings
+        self.vector_store = caches.vectors   # 클러스터링 / 매칭용 (축소 설정 시 축소 벡터)
+        self.group_cache = caches.group
+        self.readme_cache = caches.readme
+        self.expand_cache = caches.expand
+        self.run_cache = caches.runs
+
+
+    # ----------------------------
+    # 📄 본문 추출
+    # ----------------------------
+    def extract_documents(self, files, hashes):
+        # PDF 는 프로세스 풀에서 페이지 단위로, MD/TXT 는 점진 디코딩 — 둘 다 예산까지만
+        return extract_texts(
+            [(f.name, f.getvalue()) for f in files],
+            budget=self.settings.extract_char_budget,
+            cache=self.caches.extracts,
+            hashes=hashes,
+        )
+
+    # ----------------------------
+    # 🧠 0차 GPT EXPAND
+    # ----------------------------
+    async def expand_document_with_gpt(self, key, file, text=""):
+        # key: 파일 내용의 content hash (이름이 바뀐 같은 파일도 같은 결과 재사용)
+        if key in self.expand_cache:
+            return self.expand_cache[key]
+
+        prompt = f"""
+다음 문서를 분류하기 쉽게 의미적으로 정규화하라.
+분류나 그룹핑은 하지 말고, 의미만 추출하라.
+
+출력은 반드시 JSON 하나만 출력한다.
+
+형식:
+{{
+  "canonical_title": "...",
+  "keywords": ["...", "..."],
+  "domain": "...",
+  "embedding_text": "..."
+}}
+
+문서 파일명:
+{file.name}
+
+문서 내용 (앞부분):
+{text[:self.settings.expand_excerpt_chars]}
+"""
+
+        try:
+            r = await self.engine.chat(
+                model=self.settings.expand_model,
+                messages=[
+                    {"role": "system", "content": "너는 문서를 분류하기 쉽게 정규화하는 역할이다."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+            )
+            data = json.loads(r["choices"][0]["message"]["content"])
+            if "embedding_text" not in data:
+                raise ValueError
+
+        except Exception:
+            data = expand_fallback(file.name)
+
+        self.expand_cache[key] = data
+        return data
+
+    # ----------------------------
+    # 📦 0차 GPT EXPAND (배치 모드)
+    # ----------------------------
+    async def expand_batch_with_gpt(self, keys, files, texts):
+        """파일 N개를 한 번의 요청으로 정규화. 파싱에 실패한 항목만 다시 요청"""
+        results = {}
+        pending = list(range(len(files)))
+
+        for _ in range(1 + self.settings.expand_batch_retries):
+            listing = "\n".join(
+                f"{n}: {files[i].name}\n   내용: {texts[i][:self.settings.expand_excerpt_chars]}"
+                for n, i in enumerate(pending)
+            )
+
+            prompt = f"""
+다음 문서들을 각각 분류하기 쉽게 의미적으로 정규화하라.
+분류나 그룹핑은 하지 말고, 문서별로 의미만 추출하라.
+
+출력은 반드시 JSON 배열 하나만 출력한다.
+각 원소에는 입력 번호를 "index" 로 그대로 넣는다.
+
+형식:
+[
+  {{
+    "index": 0,
+    "canonical_title": "...",
+    "keywords": ["...", "..."],
+    "domain": "...",
+    "embedding_text": "..."
+  }}
+]
+
+문서 파일명 / 내용(앞부분) 목록:
+{listing}
+"""
+
+            try:
+                r = await self.engine.chat(
+                    model=self.settings.expand_model,
+                    messages=[
+                        {"role": "system", "content": "너는 문서를 분류하기 쉽게 정규화하는 역할이다."},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.2,
+                )
+                parsed = parse_expand_batch(r["choices"][0]["message"]["content"])
+            except Exception:
+                parsed = {}
+
+            for n, i in enumerate(pending):
+                if n in parsed:
+                    results[i] = parsed[n]
+            pending = [i for i in pending if i not in results]
+            if not pending:
+                break
+
+        for i, f in enumerate(files):
+            data = results.get(i) or expand_fallback(f.name)
+            self.expand_cache[keys[i]] = data
+            results[i] = data
+
+        return [results[i] for i in range(len(files))]
+
+    # ----------------------------
+    # ⭐ 추가: 0차 EXPAND 병렬 처리 (asyncio + 요청 엔진)
+    # ----------------------------
+    def expand_documents_parallel(self, keys, files, texts=None):
+        texts = texts or [""] * len(files)
+
+        # 캐시 miss 만 중복 제거 후 self.settings.expand_batch_size 개씩 묶어서 요청
+        missing = list({k: (k, f, t) for k, f, t in zip(keys, files, texts) if k not in self.expand_cache}.values())
+        missing_keys = [k for k, _, _ in missing]
+        missing_files = [f for _, f, _ in missing]
+        missing_texts = [t for _, _, t in missing]
+
+        async def _expand_all():
+            if self.settings.expand_batch_size <= 1:
+                jobs = [self.expand_document_with_gpt(k, f, t) for k, f, t in missing]
+            else:
+                jobs = [
+                    self.expand_batch_with_gpt(
+                        missing_keys[i:i + self.settings.expand_batch_size],
+                        missing_files[i:i + self.settings.expand_batch_size],
+                        missing_texts[i:i + self.settings.expand_batch_size],
+                    )
+                    for i in range(0, len(missing), self.settings.expand_batch_size)
+                ]
+            return await asyncio.gather(*jobs, return_exceptions=True)
+
+        if self.shard_count(len(missing)) > 1:
+            self.expand_sharded(missing)
+        elif missing:
+            self.engine.run(_expand_all())
+
+        return [self.expand_cache.get(k) or expand_fallback(f.name) for k, f in zip(keys, files)]
+
+    # ----------------------------
+    # ✨ 임베딩
+    # ----------------------------
+    def embed_params(self):
+        return {"dimensions": self.settings.embed_dimensions} if self.settings.embed_dimensions else {}
+
+    def embed_texts(self, texts):
+        keys = [h(t) for t in texts]
+        missing = list({k: t for k, t in zip(keys, texts) if k not in self.embedding_cache}.items())
+
+        if self.shard_count(len(missing)) > 1:
+            self.embed_sharded(missing)
+        elif missing:
+            # 토큰 추정치로 배치를 채워 동시에 요청 (실패한 배치는 반으로 나눠 재요청)
+            # 끝난 배치는 바로 캐시에 저장 → 중간에 실패해도 다음 실행에서 재사용
+            def on_batch(idx, vectors):
+                self.embedding_cache.add([missing[i][0] for i in idx], vectors)
+
+            self.engine.run(self.engine.embed_many(
+                [t for _, t in missing],
+                on_batch=on_batch,
+                model=self.settings.embed_model,
+                **self.embed_params(),
+            ))
+
+        # (len(texts), dim) float32 배열 (축소 설정 시 축소 차원)
+        return self.vector_store.take(keys)
+
+    # ----------------------------
+    # 📋 실행 단위 문서 테이블
+    # ----------------------------
+    def doc_vectors(self, table):
+        # 처음 클러스터링이 필요할 때 1회만 본문 추출 + expand + 임베딩 → (n, dim) 행렬
+        # 체크포인트가 있으면 단계마다 저장 → 재시작 시 끝난 단계는 읽기만
+        if table["vectors"] is None:
+            hashes = table["hashes"]
+            ckpt = table["checkpoint"] or RunCheckpoint()
+            table["texts"] = ckpt.by_hash(
+                "texts", hashes, lambda: self.extract_documents(table["files"], hashes),
+            )
+            table["expanded"] = ckpt.by_hash(
+                "expanded", hashes, lambda: self.expand_documents_parallel(hashes, table["files"], table["texts"]),
+            )
+            table["vectors"] = ckpt.matrix(
+                "vectors", hashes, lambda: self.embed_texts([e["embedding_text"] for e in table["expanded"]]),
+            )
+        return table["vectors"]
+
+    # ----------------------------
+    # 📦 클러스터링
+    # ----------------------------
+    def cluster_documents(self, table, idx, depth=0):
+        vectors = self.doc_vectors(table)
+
+        if self.settings.cluster_single_fit:
+            # 전체 코퍼스에 1회만 fit → 모든 깊이의 분할을 같은 condensed tree 에서 읽기
+            if table["tree"] is None:
+                table["tree"] = CondensedTreeSplitter(
+                    vectors,
+                    min_cluster_size=self.settings.hdbscan_min_cluster_size,
+                    min_samples=self.settings.hdbscan_min_samples,
+                )
+            return table["tree"].labels_for(idx)
+
+        # 크기 / 깊이에 따라 백엔드 자동 선택 (큰 재분해는 크기 상한이 보장되는 kmeans)
+        name = self.settings.cluster_backend
+        if name == "auto":
+            name = select_backend(len(idx), depth, self.settings.max_files_per_cluster)
+        backend = make_backend(
+            name,
+            min_cluster_size=self.settings.hdbscan_min_cluster_size,
+            min_samples=self.settings.hdbscan_min_samples,
+        )
+
+        # ⭐ 변경: 공용 행렬의 index slice 로만 클러스터링 (깊이마다 expand/임베딩 재계산 없음)
+        return backend.fit_predict(vectors[idx], self.settings.max_files_per_cluster)
+
+    # ----------------------------
+    # 🔁 자동 재분해
+    # ----------------------------
+    def recursive_cluster(self, table, idx=None, depth=0):
+        """문서 테이블의 행 번호 배열 목록 반환"""
+        if idx is None:
+            idx = np.arange(len(table["files"]))
+
+        if len(idx) <= self.settings.max_files_per_cluster or depth >= self.settings.max_recursion_depth:
+            return [idx]
+
+        labels = self.cluster_documents(table, idx, depth)
+        groups = {}
+        for i, l in zip(idx, labels):
+            groups.setdefault(l, []).append(i)
+
+        result = []
+        for g in groups.values():
+            g = np.asarray(g)
+            if len(g) > self.settings.max_files_per_cluster:
+                result.extend(self.recursive_cluster(table, g, depth + 1))
+            else:
+                result.append(g)
+
+        return result
+
+    # ----------------------------
+    # ✨ GPT 폴더명 / README
+    # ----------------------------
+    async def generate_group_name(self, names, keys=None):
+        # keys: 문서 content hash 목록 (없으면 파일명 기준)
+        k = group_name_key(names, keys)
+        if k in self.group_cache:
+            return self.group_cache[k]
+
+        prompt = """
+다음 문서 제목들의 공통 주제를 대표하는
+짧고 명확한 한글 폴더명 하나만 출력하세요.
+
+규칙:
+- 2~4 단어
+- 조사 사용 금지
+- 숫자/번호 금지
+- 설명 금지
+"""
+
+        r = await self.engine.chat(
+            model=self.settings.folder_model,
+            messages=[
+                {"role": "system", "content": "너는 한글 폴더명만 생성한다."},
+                {"role": "user", "content": prompt + "\n" + "\n".join(names)},
+            ],
+            temperature=0.3,
+        )
+
+        name = sanitize_folder_name(r["choices"][0]["message"]["content"])
+        self.group_cache[k] = name
+        return name
+
+    async def summarize_chunk(self, items, level):
+        """map 단계: 문서 목록(또는 하위 요약) 한 묶음 → 짧은 요약 (캐시)"""
+        k = h(f"map{level}||" + "||".join(items))
+        if k in self.readme_cache:
+            return self.readme_cache[k]
+
+        what = "문서 목록" if level == 0 else "문서 묶음 요약"
+        prompt = f"""
+다음 {what}의 공통 주제와 주요 하위 주제를 한국어 5줄 이내로 요약하세요.
+
+{chr(10).join(items)}
+"""
+
+        r = await self.engine.chat(
+            model=self.settings.folder_model,
+            messages=[
+                {"role": "system", "content": "너는 한국어로 짧게 요약한다."},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=300,
+            temperature=0.2,
+        )
+
+        content = r["choices"][0]["message"]["content"].strip()
+        self.readme_cache[k] = content
+        return content
+
+    async def describe_files(self, files):
+        """README 프롬프트용 문서 목록. self.settings.readme_chunk_size 를 넘으면 map-reduce 요약으로 대체"""
+        if len(files) <= self.settings.readme_chunk_size:
+            return "문서 목록:\n" + "\n".join(files)
+        parts = await map_reduce_texts(sorted(files), self.settings.readme_chunk_size, self.summarize_chunk)
+        return f"문서 {len(files)}개 묶음 요약:\n" + "\n\n".join(parts)
+
+    def append_file_list(self, readme, files):
+        # 큰 폴더는 문서 목록을 모델이 다시 쓰지 않게 하고 여기서 붙인다
+        if len(files) <= self.settings.readme_chunk_size:
+            return readme
+        return readme + "\n\n## 포함된 문서 목록\n" + "\n".join(f"- {f}" for f in files)
+
+    async def generate_readme(self, topic, files, auto_split=False, keys=None):
+        k = readme_key(topic, files, auto_split, keys)
+        if k in self.readme_cache:
+            return self.readme_cache[k]
+
+        notice = AUTO_SPLIT_NOTICE if auto_split else ""
+        listing = await self.describe_files(files)
+
+        prompt = f"""
+{notice}다음 문서들은 '{topic}' 주제로 분류된 자료입니다.
+각 문서의 관계와 활용 목적을 설명하는 README.md를 작성하세요.
+반드시 한국어로 작성하세요.
+
+{listing}
+"""
+
+        r = await self.engine.chat(
+            model=self.settings.folder_model,
+            messages=[
+                {"role": "system", "content": "너는 한국어로만 README를 작성한다."},
+                {"role": "user", "content": prompt},
+            ],
+        )
+
+        content = self.append_file_list(notice + r["choices"][0]["message"]["content"].strip(), files)
+        self.readme_cache[k] = content
+        return content
+
+    # ----------------------------
+    # 🧩 폴더명 + README 통합 요청
+    # ----------------------------
+    async def generate_folder(self, names, files, keys=None):
+        """폴더명 + README 를 한 번의 요청으로 생성. 결과는 기존 두 캐시 키에 그대로 저장"""
+        gk = group_name_key(names, keys)
+        if gk in self.group_cache:
+            # 폴더명은 캐시 그대로 유지 (실행마다 이름이 바뀌지 않게) → README 만 없으면 README 만 요청
+            name = self.group_cache[gk]
+            return name, await self.generate_readme(name, files, keys=keys)
+
+        listing = await self.describe_files(files)
+        prompt = f"""
+다음 문서들의 공통 주제를 대표하는 폴더명과, 그 폴더에 넣을 README.md를 함께 작성하세요.
+
+폴더명 규칙:
+- 짧고 명확한 한글 2~4 단어
+- 조사 사용 금지
+- 숫자/번호 금지
+
+README 규칙:
+- 반드시 한국어로 작성
+- 각 문서의 관계와 활용 목적을 설명
+
+출력은 반드시 JSON 하나만 출력한다.
+형식:
+{{"folder_name": "...", "readme": "..."}}
+
+{listing}
+"""
+
+        try:
+            r = await self.engine.chat(
+                model=self.settings.folder_model,
+                messages=[
+                    {"role": "system", "content": "너는 한글 폴더명과 한국어 README를 JSON으로만 출력한다."},
+                    {"role": "user", "content": prompt},
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.3,
+            )
+            parsed = parse_folder_response(r["choices"][0]["message"]["content"])
+        except Exception:
+            parsed = None
+
+        if parsed is None:
+            # 검증 실패 → 기존 2단계 요청으로 대체
+            name = await self.generate_group_name(names, keys)
+            return name, await self.generate_readme(name, files, keys=keys)
+
+        name, readme = parsed
+        readme = self.append_file_list(readme, files)
+        self.group_cache[gk] = name
+        self.readme_cache[readme_key(name, files, keys=keys)] = readme
+        return name, readme
+
+    # ----------------------------
+    # 🌳 증분 정리 (기존 폴더 트리에 배치)
+    # ----------------------------
+    def load_org_model(self):
+        """저장된 폴더 트리 (없으면 None). 벡터 공간이 바뀌었으면 합만 다시 계산
+
+        새 공간에 없는 구성원 임베딩은 expand 캐시의 embedding_text 로 다시 임베딩한다.
+        그래도 읽거나 복구할 수 없으면 트리 파일은 지우지 않고 백업해 둔 뒤 None (→ 전체 분류)
+        """
+        if not self.org_model_path.exists():
+            return None
+        try:
+            model = OrgModel.load(self.org_model_path)
+            space = self.caches.vector_space()
+            if model.space != space:
+                self.log(f"[벡터 공간 변경 ({model.space} → {space}): 폴더 트리 중심 다시 계산]")
+                self.embed_missing_members(model)
+                model.rebuild_sums(self.vector_store, space)
+                model.save(self.org_model_path)
+        except Exception as e:
+            p = self.org_model_path
+            backup = p.with_name(f"{p.stem}.{int(time.time())}.bak{p.suffix}")
+            os.replace(p, backup)
+            self.log(f"[폴더 트리를 쓸 수 없어 전체 다시 분류 ({type(e).__name__}) — 기존 트리는 {backup.name} 로 보관]")
+            return None
+        return model if model.leaves else None
+
+    def embed_missing_members(self, model):
+        """현재 벡터 스토어에 없는 구성원 임베딩을 expand 캐시의 embedding_text 로 다시 요청"""
+        missing = [
+            (ch, vk)
+            for leaf in model.leaves
+            for ch, (_, vk) in leaf["members"].items()
+            if vk not in self.vector_store
+        ]
+        if not missing:
+            return
+
+        texts = []
+        for ch, vk in missing:
+            text = (self.expand_cache.get(ch) or {}).get("embedding_text")
+            if not text or h(text) != vk:
+                raise KeyError(f"embedding_text not cached for member {ch}")
+            texts.append(text)
+        self.log(f"[폴더 트리 구성원 {len(texts)}개 다시 임베딩]")
+        self.embed_texts(texts)
+
+    def save_org_model(self, table, folders):
+        """전체 분류 결과 → 폴더 트리 저장 (다음 실행부터 증분 배치의 기준) → 저장한 OrgModel"""
+        vectors = self.doc_vectors(table)
+        leaves = []
+        for main_group, _, sub_folders in folders:
+            for sub_group, sub_idx in sub_folders:
+                members = {
+                    ch: [f.name, vk]
+                    for ch, f, vk in zip(keys_at(table, sub_idx), files_at(table, sub_idx), vec_keys_at(table, sub_idx))
+                }
+                leaves.append((main_group, sub_group, members, vectors[sub_idx]))
+        model = OrgModel.build(self.caches.vector_space(), leaves, vectors.shape[1])
+        model.save(self.org_model_path)
+        return model
+
+    def split_oversized_leaves(self, model, leaves):
+        """self.settings.max_files_per_cluster 를 넘은 폴더만 다시 분해 (구성원 벡터는 캐시에서 읽기)"""
+        splits = []
+        for leaf in sorted(leaves, reverse=True):
+            items = list(model.leaves[leaf]["members"].items())   # [(hash, [name, vec_key]), ...]
+            vectors = self.vector_store.take([vk for _, (_, vk) in items])
+            parts = self.recursive_cluster({"files": items, "vectors": vectors, "tree": None})
+            if len(parts) > 1:
+                splits.append((leaf, items, vectors, parts))
+        if not splits:
+            return
+
+        name_jobs = [
+            self.generate_group_name(
+                [items[i][1][0].rsplit(".", 1)[0] for i in part],
+                [items[i][0] for i in part],
+            )
+            for _, items, _, parts in splits
+            for part in parts
+        ]
+        names = iter(self.engine.run(gather_with_progress(name_jobs)))
+
+        # 뒤쪽 잎부터 교체 → 앞쪽 잎 번호는 그대로
+        for leaf, items, vectors, parts in splits:
+            main_group = model.leaves[leaf]["main"]
+            used_names = {model.leaves[l]["sub"] for l in model.leaves_of(main_group) if l != leaf}
+            new_parts = []
+            for part in parts:
+                sub_group = unique_folder_name(next(names), used_names)
+                used_names.add(sub_group)
+                new_parts.append((sub_group, {items[i][0]: items[i][1] for i in part}, vectors[part]))
+            model.replace_leaf(leaf, new_parts)
+            self.log(f"{main_group} 폴더 재분해 → {len(parts)}개")
+
+    def place_documents(self, table, model):
+        """새 문서는 가장 가까운 폴더에 1회 벡터 연산으로 배치, 넘친 폴더만 재분해 → 트리 저장
+
+        폴더 트리를 읽고 쓰는 단계 → org_lock 안에서 호출
+        """
+        vectors = self.doc_vectors(table)
+        hashes = table["hashes"]
+
+        new_rows = np.array([i for i, ch in enumerate(hashes) if ch not in model.member_of], dtype=int)
+        for i, leaf in zip(new_rows, model.assign(vectors[new_rows])):
+            model.add(int(leaf), hashes[i], table["files"][i].name, vec_keys_at(table, [i])[0], vectors[i])
+        self.log(f"[기존 폴더 트리에 배치: 새 문서 {len(new_rows)}개 / 기존 문서 {len(hashes) - len(new_rows)}개]")
+
+        touched = {model.member_of[ch] for ch in hashes}
+        self.split_oversized_leaves(model, [l for l in touched if len(model.leaves[l]["members"]) > self.settings.max_files_per_cluster])
+        if len(new_rows):
+            model.save(self.org_model_path)
+
+    def organize_incremental(self, table, model, on_done=None):
+        """place_documents 로 배치된 트리 → (folders, readmes)
+
+        전체 분류와 같은 형식 (이번 업로드가 들어간 폴더만)
+        README 는 폴더 전체 구성원 기준 (구성원이 그대로면 캐시 재사용)
+        """
+        hashes = table["hashes"]
+        rows_by_leaf = {}
+        for i, ch in enumerate(hashes):
+            rows_by_leaf.setdefault(model.member_of[ch], []).append(i)
+
+        def leaf_members(leaves):
+            members = [(ch, name) for l in leaves for ch, (name, _) in model.leaves[l]["members"].items()]
+            return [name for _, name in members], [ch for ch, _ in members]
+
+        folders, readme_jobs = [], []
+        for main_group in dict.fromkeys(model.leaves[l]["main"] for l in sorted(rows_by_leaf)):
+            leaves = model.leaves_of(main_group)
+            names, keys = leaf_members(leaves)
+            readme_jobs.append(self.generate_readme(main_group, names, keys=keys))
+
+            sub_folders = []
+            for l in leaves:
+                if l not in rows_by_leaf:
+                    continue
+                sub_group = model.leaves[l]["sub"]
+                names, keys = leaf_members([l])
+                readme_jobs.append(self.generate_readme(f"{main_group} - {sub_group}", names, keys=keys))
+                sub_folders.append((sub_group, np.asarray(rows_by_leaf[l])))
+            folders.append((main_group, None, sub_folders))
+
+        readmes = self.engine.run(gather_with_progress(readme_jobs, on_done))
+        return folders, readmes
+
+    # ----------------------------
+    # 🧾 실행 결과 메모이제이션
+    # ----------------------------
+    def run_key(self, table, org_model=None):
+        """업로드 내용(정렬된 content hash) + 파이프라인 설정 (+ 증분이면 폴더 트리 상태) → 실행 키"""
+        settings = {
+            "max_files": self.settings.max_files_per_cluster,
+            "max_depth": self.settings.max_recursion_depth,
+            "hdbscan": [self.settings.hdbscan_min_cluster_size, self.settings.hdbscan_min_samples],
+            "single_fit": self.settings.cluster_single_fit,
+            "backend": self.settings.cluster_backend,
+            "space": self.caches.vector_space(),
+            "models": [self.settings.expand_model, self.settings.embed_model, self.settings.folder_model],
+            "extract": [self.settings.extract_char_budget, self.settings.expand_excerpt_chars],
+            "folder": [self.settings.folder_combined_call, self.settings.readme_chunk_size],
+        }
+        state = "full" if org_model is None else "tree:" + org_model.fingerprint
+        return h(json.dumps({"docs": sorted(table["hashes"]), "settings": settings, "state": state}, sort_keys=True))
+
+    # ----------------------------
+    # 🧮 멀티 프로세스 샤딩
+    # ----------------------------
+    def shard_count(self, n):
+        return min(self.shards, n // SHARD_MIN_ITEMS)
+
+    def run_shards(self, fn, items, *args):
+        """items 를 나눠 fn(api_key, rpm, tpm, *args, 샤드) 를 spawn 프로세스에서 실행
+
+        - 프로세스마다 새 LLMEngine, RPM / TPM 한도는 샤드 수로 나눔 → 합이 원래 한도
+        - 캐시는 단일 writer 이므로 결과는 부모가 받아 기록 (끝난 샤드부터 yield)
+        """
+        n = self.shard_count(len(items))
+        size = math.ceil(len(items) / n)
+        rpm, tpm = self.engine.budget.rpm / n, self.engine.budget.tpm / n
+        self.log(f"[{len(items)}개 요청을 프로세스 {n}개로 분할]")
+
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(fn, self.engine.api_key, rpm, tpm, *args, items[i:i + size])
+                for i in range(0, len(items), size)
+            ]
+            for fut in as_completed(futures):
+                result, stats = fut.result()
+                for k, v in stats.items():
+                    self.engine.stats[k] = self.engine.stats.get(k, 0) + v
+                yield result
+
+    def expand_sharded(self, missing):
+        items = [(k, f.name, t) for k, f, t in missing]
+        for results in self.run_shards(expand_shard, items, self.settings):
+            for k, data in results.items():
+                self.expand_cache[k] = data
+
+    def embed_sharded(self, missing):
+        for keys, vectors in self.run_shards(embed_shard, missing, self.settings.embed_model, self.embed_params()):
+            self.embedding_cache.add(keys, vectors)
+
+    # ----------------------------
+    # 🗂️ 전체 분류
+    # ----------------------------
+    def folder_plan(self, table):
+        """📐 폴더 계획: [(메인 행 번호, [서브 행 번호, ...]), ...] — 클러스터링은 여기서 모두 끝냄
+
+        체크포인트에는 content hash 로 저장 → 재시작해도 같은 계획 (끝난 폴더 번호가 그대로 유효)
+        """
+        ckpt = table["checkpoint"] or RunCheckpoint()
+        row_of = {ch: i for i, ch in enumerate(table["hashes"])}
+
+        def rows(keys):
+            return np.array([row_of[ch] for ch in keys], dtype=int)
+
+        saved = ckpt.get("plan")
+        if saved is not None:
+            return [(rows(main), [rows(sub) for sub in subs]) for main, subs in saved]
+
+        plan = [(cluster_idx, self.recursive_cluster(table, cluster_idx)) for cluster_idx in self.recursive_cluster(table)]
+        ckpt.put("plan", [[keys_at(table, c), [keys_at(table, s) for s in subs]] for c, subs in plan])
+        return plan
+
+    async def name_cluster(self, table, cluster_idx, subs, track):
+        """메인 폴더 1개 (+ 서브 폴더) 의 폴더명 / README → {"names": [메인, 서브, ...], "readmes": [...]}
+
+        track(coro) 는 요청 1건이 끝날 때마다 진행률을 올린다.
+        """
+        def stem_names(idx):
+            return [f.name.rsplit(".", 1)[0] for f in files_at(table, idx)]
+
+        def file_names(idx):
+            return [f.name for f in files_at(table, idx)]
+
+        groups = [cluster_idx, *subs]
+        combined = self.settings.folder_combined_call
+
+        # 1) 폴더명: 메인 + 서브 동시에 요청 (캐시 키는 content hash → 이름만 바뀐 재업로드는 API 호출 없음)
+        #    통합 모드: 폴더명 + README 를 폴더당 1회 요청으로 (README 단계 대기 없음)
+        # 같은 문서 집합(= 같은 캐시 키) 은 요청 1건을 공유 → 메인 / 서브 이름도 어긋나지 않는다
+        unique, slots = distinct_groups(table, groups)
+        if combined:
+            generated = await asyncio.gather(*(
+                track(self.generate_folder(stem_names(idx), file_names(idx), keys_at(table, idx))) for idx in unique
+            ))
+            names = [generated[slot][0] for slot in slots]
+            readmes = [generated[slot][1] for slot in slots]
+        else:
+            generated = await asyncio.gather(*(
+                track(self.generate_group_name(stem_names(idx), keys_at(table, idx))) for idx in unique
+            ))
+            names = [generated[slot] for slot in slots]
+
+        main_group = names[0]
+        used_names = set()
+        sub_names = []
+        for name in names[1:]:
+            sub_group = unique_folder_name(name, used_names)
+            used_names.add(sub_group)
+            sub_names.append(sub_group)
+
+        # 2) README: 폴더명이 정해진 뒤 동시에 요청
+        if combined:
+            # 2단계 모드의 서브 폴더 README 키("메인 - 서브") 로도 저장 → 모드를 바꿔도 재사용
+            for sub_group, sub_idx, readme in zip(sub_names, subs, readmes[1:]):
+                k = readme_key(f"{main_group} - {sub_group}", file_names(sub_idx), keys=keys_at(table, sub_idx))
+                self.readme_cache[k] = readme
+        else:
+            readmes = await asyncio.gather(
+                track(self.generate_readme(main_group, file_names(cluster_idx), keys=keys_at(table, cluster_idx))),
+                *(
+                    track(self.generate_readme(f"{main_group} - {sub_group}", file_names(sub_idx), keys=keys_at(table, sub_idx)))
+                    for sub_group, sub_idx in zip(sub_names, subs)
+                ),
+            )
+
+        return {"names": [main_group, *sub_names], "readmes": list(readmes)}
+
+    def cluster_requests(self, table, cluster_idx, subs):
+        """name_cluster 1회의 요청 수 (진행률 분모) — 폴더명은 문서 집합당 1건 (+ 2단계 모드는 폴더마다 README)"""
+        n_names = len(distinct_groups(table, [cluster_idx, *subs])[0])
+        return n_names if self.settings.folder_combined_call else n_names + 1 + len(subs)
+
+    def organize_full(self, table, on_progress=None):
+        """재귀 클러스터링 → 폴더명 / README. 반환: (folders, readmes)
+
+        메인 폴더 단위로 동시에 요청하고 끝난 폴더는 바로 체크포인트에 저장
+        → 재시작하면 끝나지 않은 폴더만 다시 요청한다.
+        """
+        ckpt = table["checkpoint"] or RunCheckpoint()
+        plan = self.folder_plan(table)
+        total = sum(self.cluster_requests(table, *p) for p in plan)
+
+        done = {}
+        for i in range(len(plan)):
+            saved = ckpt.get(f"folder.{i}")
+            if saved is not None:
+                done[i] = saved
+        finished = sum(self.cluster_requests(table, *plan[i]) for i in done)
+        if done:
+            self.log(f"[체크포인트에서 이어서: 메인 폴더 {len(done)} / {len(plan)}개 완료]")
+
+        async def track(coro):
+            nonlocal finished
+            result = await coro
+            finished += 1
+            if on_progress is not None:
+                on_progress(finished, total)
+            return result
+
+        async def run_cluster(i):
+            done[i] = await self.name_cluster(table, *plan[i], track)
+            ckpt.put(f"folder.{i}", done[i])
+
+        async def run_all():
+            await asyncio.gather(*(run_cluster(i) for i in range(len(plan)) if i not in done))
+
+        self.engine.run(run_all())
+
+        folders = []   # [(메인 이름, 메인 행 번호, [(서브 이름, 서브 행 번호), ...]), ...]
+        readmes = []
+        for i, (cluster_idx, subs) in enumerate(plan):
+            main_group, *sub_names = done[i]["names"]
+            folders.append((main_group, cluster_idx, list(zip(sub_names, subs))))
+            readmes.extend(done[i]["readmes"])
+        return folders, readmes
+
+    # ----------------------------
+    # 🚀 한 번의 실행
+    # ----------------------------
+    def organize(self, table, full_recluster=False, on_progress=None):
+        """문서 테이블 → (folders, readmes, mode)
+
+        mode: "memo" (같은 업로드 / 설정의 이전 결과) / "incremental" (기존 폴더 트리에 배치) / "full"
+        on_progress(완료 수, 전체 수) 는 폴더명 / README 요청이 끝날 때마다 호출
+
+        같은 입력 + 같은 설정의 실행은 단계별 체크포인트(본문 / expand / 임베딩 행렬 / 폴더 계획 /
+        끝난 메인 폴더) 를 공유 → 중단된 실행을 다시 시작하면 끝나지 않은 단계부터 이어서
+        """
+        root = Path(self.checkpoint_dir or Path(self.caches.dir) / "checkpoints")
+        RunCheckpoint.prune(root, CHECKPOINT_KEEP_DAYS)
+        table["checkpoint"] = RunCheckpoint(root / self.run_key(table))
+
+        # 같은 업로드 + 같은 설정 (+ 같은 폴더 트리) 이면 저장된 폴더 배정 / README 를 그대로 쓴다
+        # → 추출 / expand / 임베딩보다 먼저 확인
+        # ("전체 다시 분류" 요청은 메모를 건너뛴다 → 실제로 다시 클러스터링하고 트리도 새로 저장)
+        if not full_recluster:
+            org_model = self.load_org_model() if self.settings.organize_incremental else None
+            memo = self.run_cache.get(self.run_key(table, org_model))
+            if memo is not None:
+                return self.reuse_run(table, org_model, memo)
+
+        # 추출 / expand / 임베딩은 잠금 밖 → 폴더 트리를 읽고 쓰는 배치 단계만 작업 간 직렬화
+        self.doc_vectors(table)
+
+        if self.settings.organize_incremental and not full_recluster:
+            with org_lock(self.org_model_path):
+                # 기다리는 동안 다른 작업이 트리를 바꿨을 수 있으므로 잠금 안에서 다시 읽는다
+                org_model = self.load_org_model()
+                run_k = self.run_key(table, org_model)
+                if org_model is not None:
+                    self.place_documents(table, org_model)
+            if org_model is not None:
+                # README 요청 수는 배치 후에 정해진다 → 진행률은 gather 요청 수 기준
+                folders, readmes = self.organize_incremental(table, org_model, progress_callback(on_progress))
+                run_keys = [run_k, self.run_key(table, org_model)]
+                return self.finish_run(table, run_keys, folders, readmes, "incremental")
+
+        # 저장된 폴더 트리가 없거나 "전체 다시 분류" 면 처음부터 클러스터링
+        run_keys = [self.run_key(table)]
+        folders, readmes = self.organize_full(table, on_progress)
+        if self.settings.organize_incremental:
+            with org_lock(self.org_model_path):
+                run_keys.append(self.run_key(table, self.save_org_model(table, folders)))
+        return self.finish_run(table, run_keys, folders, readmes, "full")
+
+    def reuse_run(self, table, org_model, memo):
+        self.log("[같은 업로드 / 설정의 이전 결과 재사용]")
+        folders, readmes = unpack_run(table, memo)
+        if org_model is None and self.settings.organize_incremental:
+            # 트리가 없는 상태의 메모 → 다음 업로드부터 증분 배치되도록 트리만 만든다 (벡터는 캐시에서)
+            with org_lock(self.org_model_path):
+                if not self.org_model_path.exists():
+                    self.save_org_model(table, folders)
+        table["checkpoint"].remove()
+        return folders, readmes, "memo"
+
+    def finish_run(self, table, run_keys, folders, readmes, mode):
+        # 실행 전 트리 상태 + 이번 실행이 저장한 트리 상태 둘 다의 키로 기록
+        # → 같은 업로드를 다시 올리면 (바뀐 트리 기준으로 찾아도) 바로 메모
+        # 끝난 실행은 실행 메모가 맡으므로 체크포인트는 삭제
+        memo = pack_run(table, folders, readmes)
+        for run_k in dict.fromkeys(run_keys):
+            self.run_cache[run_k] = memo
+        self.run_cache.flush()
+        table["checkpoint"].remove()
+        return folders, readmes, mode
+
+
+# ============================
+# 📦 결과 기록
+# ============================
+def folder_entries(table, folders, readmes):
+    """정리 결과 → 메인 폴더마다 (메인 이름, [(상대 경로, 파일), ...]) — ZIP / 디렉터리 기록 공용
+
+    파일은 .getvalue() 로 읽는다 (README 는 LocalFile). 중복 업로드는 여기서 다시 펼친다.
+    """
+    readmes = iter(readmes)
+    for main_group, _, sub_folders in folders:
+        entries = [(f"{main_group}/★README_{main_group}.md", readme_file(main_group, next(readmes)))]
+        for sub_group, sub_idx in sub_folders:
+            for f in copies_at(table, sub_idx):
+                entries.append((f"{main_group}/{sub_group}/{f.name}", f))
+            entries.append((f"{main_group}/{sub_group}/★README_{sub_group}.md", readme_file(sub_group, next(readmes))))
+        yield main_group, entries
+
+
+def readme_file(folder, text):
+    return LocalFile(f"★README_{folder}.md", text.encode("utf-8"))
+
+
+# ============================
+# 🧮 샤드 프로세스 (spawn 으로 시작 → 모듈 최상위 함수만)
+# ============================
+def memory_caches():
+    """샤드 프로세스용 메모리 캐시 (디스크 캐시는 부모 프로세스만 기록)"""
+    return SimpleNamespace(embeddings=None, vectors=None, group={}, readme={}, expand={}, runs={})
+
+
+def expand_shard(api_key, rpm, tpm, settings, items):
+    """[(content hash, 파일명, 본문), ...] → ({hash: expand 결과}, 요청 통계)"""
+    engine = LLMEngine(api_key=api_key, rpm=rpm, tpm=tpm)
+    pipeline = DocumentPipeline(memory_caches(), engine, settings)
+    pipeline.expand_documents_parallel(
+        [k for k, _, _ in items],
+        [LocalFile(name, b"") for _, name, _ in items],
+        [t for _, _, t in items],
+    )
+    return dict(pipeline.expand_cache), engine.stats
+
+
+def embed_shard(api_key, rpm, tpm, model, params, items):
+    """[(임베딩 키, 텍스트), ...] → ((키 목록, 벡터 목록), 요청 통계)"""
+    engine = LLMEngine(api_key=api_key, rpm=rpm, tpm=tpm)
+    vectors = engine.run(engine.embed_many([t for _, t in items], model=model, **params))
+    return ([k for k, _ in items], vectors), engine.stats
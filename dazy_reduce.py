@@ -0,0 +1,145 @@
+# AI DAZY dimensionality reduction
+
+import hashlib
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from dazy_cache import EmbeddingStore
+
+
+# ============================
+# 📉 차원 축소 모델
+# ============================
+class Reducer:
+    """PCA 또는 Gaussian random projection 으로 (n, D) → (n, dim) 축소 후 L2 정규화
+
+    원본 OpenAI 임베딩은 단위 벡터이므로, 축소 결과도 정규화해서
+    유클리드 거리(HDBSCAN) 와 cosine 유사도(매칭) 의 관계를 그대로 유지한다.
+    """
+
+    def __init__(self, method, mean, components, n_fit):
+        self.method = method
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.n_fit = int(n_fit)
+
+    @property
+    def dim(self):
+        return self.components.shape[0]
+
+    @property
+    def fingerprint(self):
+        d = hashlib.sha256(self.method.encode("utf-8"))
+        d.update(self.components.tobytes())
+        return d.hexdigest()[:12]
+
+    @classmethod
+    def fit(cls, X, method="pca", dim=256, max_rows=20000, seed=0):
+        n, D = X.shape
+        dim = min(dim, D, n)
+        rng = np.random.default_rng(seed)
+
+        if method == "random":
+            components = rng.normal(0.0, 1.0 / np.sqrt(dim), size=(dim, D))
+            return cls(method, np.zeros(D, dtype=np.float32), components, n)
+
+        if method != "pca":
+            raise ValueError(f"unknown reduction method: {method}")
+
+        from sklearn.decomposition import PCA
+
+        rows = np.sort(rng.choice(n, size=min(n, max_rows), replace=False))
+        sample = np.asarray(X[rows], dtype=np.float32)
+        pca = PCA(n_components=dim, svd_solver="randomized", random_state=seed).fit(sample)
+        return cls(method, pca.mean_, pca.components_, n)
+
+    def transform(self, X):
+        Y = (np.asarray(X, dtype=np.float32) - self.mean) @ self.components.T
+        norms = np.linalg.norm(Y, axis=1, keepdims=True)
+        return Y / np.maximum(norms, 1e-12)
+
+    def save(self, p):
+        with open(p, "wb") as fp:
+            np.savez(fp, method=self.method, mean=self.mean, components=self.components, n_fit=self.n_fit)
+
+    @classmethod
+    def load(cls, p):
+        z = np.load(p)
+        return cls(str(z["method"]), z["mean"], z["components"], int(z["n_fit"]))
+
+
+# ============================
+# 🗄️ 축소 벡터 캐시
+# ============================
+class ReducedStore:
+    """전체 임베딩 스토어 옆에 축소 벡터를 캐시 (reducer 지문마다 별도 행렬 파일)
+
+    - refresh() 에서만 fit / 재fit (한 실행 안에서는 같은 공간을 유지)
+    - 캐시된 코퍼스가 min_fit 보다 작으면 축소 없이 전체 벡터를 그대로 돌려준다
+    - 코퍼스가 fit 시점의 refit_ratio 배 이상 커지면 다시 fit
+    """
+
+    def __init__(self, full, directory, method="pca", dim=256, min_fit=512, refit_ratio=2.0):
+        self.full = full
+        self.dir = Path(directory)
+        self.method = method
+        self.target_dim = dim
+        self.min_fit = min_fit
+        self.refit_ratio = refit_ratio
+        self.model_path = self.dir / f"reducer.{full.name}.{method}{dim}.npz"
+        self._lock = threading.RLock()
+        self.reducer = None
+        self._store = None
+        if self.model_path.exists():
+            try:
+                self._use(Reducer.load(self.model_path))
+            except Exception:
+                self.model_path.unlink()
+
+    def _use(self, reducer):
+        self.reducer = reducer
+        self._store = EmbeddingStore(self.dir, name=f"reduced.{reducer.fingerprint}")
+
+    def refresh(self):
+        """실행 시작 시 1회 호출 — 필요하면 캐시된 코퍼스로 reducer fit"""
+        with self._lock:
+            n = len(self.full)
+            if n < self.min_fit:
+                return
+            if self.reducer is not None and n < self.refit_ratio * self.reducer.n_fit:
+                return
+
+            reducer = Reducer.fit(self.full.matrix, method=self.method, dim=self.target_dim)
+            if self._store is not None:
+                self._store.clear()
+            self.dir.mkdir(parents=True, exist_ok=True)
+            reducer.save(self.model_path)
+            self._use(reducer)
+
+    def __contains__(self, key):
+        return key in self.full
+
+    def __len__(self):
+        return len(self.full)
+
+    def take(self, keys):
+        keys = list(keys)
+        with self._lock:
+            if self.reducer is None:
+                return self.full.take(keys)
+
+            missing = list({k: None for k in keys if k not in self._store})
+            if missing:
+                self._store.add(missing, self.reducer.transform(self.full.take(missing)))
+            return self._store.take(keys)
+
+    def clear(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.clear()
+            if self.model_path.exists():
+                self.model_path.unlink()
+            self.reducer = None
+            self._store = None
@@ -0,0 +1,164 @@
+# AI DAZY streaming ZIP writer
+
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+
+# ============================
+# 📦 압축 정책
+# ============================
+# 이미 압축된 형식 → 다시 deflate 하지 않고 STORED
+STORED_SUFFIXES = {
+    ".pdf", ".zip", ".gz", ".7z", ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".docx", ".xlsx", ".pptx", ".hwpx", ".mp3", ".mp4",
+}
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FILECOUNT_LIMIT = 0xFFFF
+UTF8_FLAG = 0x800
+
+
+def encode_entry(arcname, data, level=6):
+    """(method, crc, 원본 크기, payload) — 스레드 풀에서 실행 (zlib 은 GIL 을 놓는다)"""
+    crc = zlib.crc32(data)
+    if PurePosixPath(arcname).suffix.lower() in STORED_SUFFIXES or len(data) < 64:
+        return ZIP_STORED, crc, len(data), bytes(data)
+
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    payload = c.compress(data) + c.flush()
+    if len(payload) >= len(data):
+        return ZIP_STORED, crc, len(data), bytes(data)
+    return ZIP_DEFLATED, crc, len(data), payload
+
+
+def dos_datetime(ts=None):
+    t = time.localtime(ts)
+    return (
+        (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday,
+    )
+
+
+# ============================
+# 🧵 스트리밍 writer
+# ============================
+class ZipStreamWriter:
+    """스테이징 디렉터리 없이 결과 ZIP 을 바로 기록
+
+    - 기본 출력은 SpooledTemporaryFile: spool_limit 까지는 메모리, 넘으면 임시 파일로 이동
+    - 텍스트 항목은 스레드 풀에서 병렬 deflate, 기록은 add() 순서대로 단일 writer
+    - 4GB / 65535 개를 넘으면 ZIP64 레코드 사용
+    """
+
+    def __init__(self, fileobj=None, spool_limit=64 * 1024 * 1024, level=6, workers=4):
+        self.fp = fileobj if fileobj is not None else tempfile.SpooledTemporaryFile(max_size=spool_limit)
+        self.level = level
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending = []
+        self._entries = []
+        self._names = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._offset = self.fp.tell()
+        self._time, self._date = dos_datetime()
+
+    def add(self, arcname, data):
+        """항목 예약 (압축은 백그라운드, 앞선 항목이 끝난 만큼만 바로 기록)"""
+        arcname = str(arcname).replace("\\", "/").lstrip("/")
+        with self._lock:
+            if arcname in self._names:
+                return
+            self._names.add(arcname)
+            self._pending.append((arcname, self._pool.submit(encode_entry, arcname, data, self.level)))
+            self._drain(block=False)
+
+    def add_text(self, arcname, text):
+        self.add(arcname, text.encode("utf-8"))
+
+    def _drain(self, block):
+        while self._pending and (block or self._pending[0][1].done()):
+            arcname, fut = self._pending.pop(0)
+            self._write_entry(arcname, *fut.result())
+
+    def _write_entry(self, arcname, method, crc, size, payload):
+        name = arcname.encode("utf-8")
+        offset = self._offset
+        zip64 = size >= ZIP64_LIMIT or len(payload) >= ZIP64_LIMIT
+
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, size, len(payload))
+        header = struct.pack(
+            "<4s2B4HL2L2H",
+            b"PK\003\004",
+            45 if zip64 else 20, 0,
+            UTF8_FLAG, method, self._time, self._date,
+            crc,
+            ZIP64_LIMIT if zip64 else len(payload),
+            ZIP64_LIMIT if zip64 else size,
+            len(name), len(extra),
+        )
+        self.fp.write(header + name + extra)
+        self.fp.write(payload)
+        self._offset += len(header) + len(name) + len(extra) + len(payload)
+        self._entries.append((name, method, crc, len(payload), size, offset))
+
+    def close(self):
+        """중앙 디렉터리 기록 후 처음 위치로 되감은 파일 객체 반환"""
+        with self._lock:
+            if self._closed:
+                return self.fp
+            self._drain(block=True)
+            self._pool.shutdown()
+            self._closed = True
+
+            cd_start = self._offset
+            for name, method, crc, csize, size, offset in self._entries:
+                big = [v for v in (size, csize, offset) if v >= ZIP64_LIMIT]
+                extra = b""
+                if big:
+                    extra = struct.pack("<HH", 0x0001, 8 * len(big)) + b"".join(struct.pack("<Q", v) for v in big)
+                record = struct.pack(
+                    "<4s4B4HL2L5H2L",
+                    b"PK\001\002",
+                    45 if big else 20, 3, 45 if big else 20, 0,
+                    UTF8_FLAG, method, self._time, self._date,
+                    crc,
+                    ZIP64_LIMIT if csize >= ZIP64_LIMIT else csize,
+                    ZIP64_LIMIT if size >= ZIP64_LIMIT else size,
+                    len(name), len(extra), 0, 0, 0,
+                    0o100644 << 16,
+                    ZIP64_LIMIT if offset >= ZIP64_LIMIT else offset,
+                )
+                self.fp.write(record + name + extra)
+                self._offset += len(record) + len(name) + len(extra)
+
+            cd_size = self._offset - cd_start
+            count = len(self._entries)
+            if count >= ZIP_FILECOUNT_LIMIT or cd_start >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+                zip64_eocd = self._offset
+                self.fp.write(struct.pack(
+                    "<4sQ2H2L4Q", b"PK\006\006", 44, 45, 45, 0, 0, count, count, cd_size, cd_start,
+                ))
+                self.fp.write(struct.pack("<4sLQL", b"PK\006\007", 0, zip64_eocd, 1))
+                self.fp.write(struct.pack(
+                    "<4s4H2LH", b"PK\005\006", 0, 0,
+                    ZIP_FILECOUNT_LIMIT, ZIP_FILECOUNT_LIMIT, ZIP64_LIMIT, ZIP64_LIMIT, 0,
+                ))
+            else:
+                self.fp.write(struct.pack("<4s4H2LH", b"PK\005\006", 0, 0, count, count, cd_size, cd_start, 0))
+
+            self.fp.flush()
+            self.fp.seek(0)
+            return self.fp
+
+    def getvalue(self):
+        """완성된 ZIP bytes (download_button 용)"""
+        return self.close().read()